@@ -1,19 +1,35 @@
-from flask import Flask, request, jsonify, render_template
-from sentence_transformers import SentenceTransformer
-import numpy as np
+import asyncio
+import threading
+
+from flask import Flask, Response, request, jsonify, render_template
 from flask_cors import CORS
 
-from constants import practo_specializations, APIConstants
-from db import RecDB
+from constants import APIConstants
+from encoding import dumps
+from metrics import registry
+from recommender import Recommender, location_error, parse_flag
+
+recommender = Recommender()
+recommender.start()
+
+# Flask would run each async view on a fresh event loop, throwing away the pooled
+# upstream connections after every request; views hand their coroutines to this one
+loop = asyncio.new_event_loop()
+threading.Thread(target=loop.run_forever, name="flask-loop", daemon=True).start()
+
+
+def run(awaitable):
+    async def wrapper():
+        return await awaitable
+    return asyncio.run_coroutine_threadsafe(wrapper(), loop).result()
+
 
-db = RecDB()
-model = SentenceTransformer("all-MiniLM-L6-v2")
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)
 
 
 @app.route('/find-doctors-by-symptoms', methods=['POST'])
-async def find_doctors_by_symptoms():
+def find_doctors_by_symptoms():
     data = request.json
     lat = data.get('latitude')
     lng = data.get('longitude')
@@ -22,14 +38,34 @@ async def find_doctors_by_symptoms():
 
     if not symptoms:
         return jsonify({"error": "Symptoms are required"}), 400
+    error = location_error(data)
+    if error is not None:
+        return jsonify({"error": error}), 400
 
-    symptom_embeddings = model.encode([symptoms] * len(practo_specializations), convert_to_numpy=True)
-    specialization_embeddings = model.encode(practo_specializations, convert_to_numpy=True)
-    max_match_index = np.argmax([np.dot(symptom_embeddings[i], specialization_embeddings[i]) for i in range(len(practo_specializations))])
+    debug = parse_flag(data.get('debug')) or parse_flag(request.args.get('debug'))
+    doctors = run(recommender.recommend(symptoms, lat, lng, radius, debug=debug))
+    return Response(dumps(doctors), mimetype='application/json')
 
-    speciality = practo_specializations[max_match_index]
-    doctors = await db.get_doctors(lat, lng, radius, speciality)
-    return jsonify(doctors)
+@app.route('/find-doctors-batch', methods=['POST'])
+def find_doctors_batch():
+    data = request.json
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "A non-empty list of items is required"}), 400
+
+    def generate():
+        # Flask streams from plain generators, so each line is pulled through the shared loop
+        lines = recommender.recommend_batch(items)
+        try:
+            while True:
+                try:
+                    yield run(lines.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            run(lines.aclose())
+
+    return Response(generate(), mimetype='application/x-ndjson')
 
 @app.route('/')
 def homepage():
@@ -39,6 +75,14 @@ def homepage():
 def get_api_key():
     return jsonify({"api_key": APIConstants.google_api})
 
+@app.route('/stats')
+def stats():
+    return jsonify(recommender.stats())
+
+@app.route('/metrics')
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,77 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, Response, request, jsonify, render_template
+from quart_cors import cors
+
+from constants import APIConstants, ServerConstants
+from encoding import dumps
+from metrics import registry
+from http_client import http
+from recommender import Recommender, location_error, parse_flag
+
+# ASGI entry point: one long-lived event loop per worker process, e.g.
+#   hypercorn --config hypercorn.toml asgi:app
+
+recommender = Recommender()
+model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model")
+app = cors(Quart(__name__, static_folder='static', template_folder='templates'))
+
+
+@app.before_serving
+async def startup():
+    # loading the model takes seconds; keep the loop free for health checks meanwhile
+    await asyncio.get_running_loop().run_in_executor(model_executor, recommender.start)
+
+
+@app.after_serving
+async def shutdown():
+    await asyncio.get_running_loop().run_in_executor(
+        model_executor, recommender.stop, ServerConstants.shutdown_timeout
+    )
+    model_executor.shutdown(wait=False)
+    await http.aclose()
+
+
+@app.route('/find-doctors-by-symptoms', methods=['POST'])
+async def find_doctors_by_symptoms():
+    data = await request.get_json()
+    lat = data.get('latitude')
+    lng = data.get('longitude')
+    radius = data.get('radius', 5000)
+    symptoms = data.get('symptoms')
+
+    if not symptoms:
+        return jsonify({"error": "Symptoms are required"}), 400
+    error = location_error(data)
+    if error is not None:
+        return jsonify({"error": error}), 400
+
+    debug = parse_flag(data.get('debug')) or parse_flag(request.args.get('debug'))
+    doctors = await recommender.recommend(symptoms, lat, lng, radius, debug=debug)
+    return Response(dumps(doctors), mimetype='application/json')
+
+@app.route('/find-doctors-batch', methods=['POST'])
+async def find_doctors_batch():
+    data = await request.get_json()
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "A non-empty list of items is required"}), 400
+
+    return Response(recommender.recommend_batch(items), mimetype='application/x-ndjson')
+
+@app.route('/')
+async def homepage():
+    return await render_template('homepage.html')
+
+@app.route('/get-api-key')
+async def get_api_key():
+    return jsonify({"api_key": APIConstants.google_api})
+
+@app.route('/stats')
+async def stats():
+    return jsonify(recommender.stats())
+
+@app.route('/metrics')
+async def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,112 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from typing import List
+
+from constants import EncoderConstants
+
+
+class BatchEncoder:
+    """
+    Collects texts submitted concurrently from many request threads and encodes
+    them with a single `model.encode` call per window, so a burst of symptom
+    queries shares one forward pass instead of running one tiny batch each.
+    """
+
+    def __init__(
+        self,
+        model,
+        window_ms: float = EncoderConstants.batch_window_ms,
+        max_batch_size: int = EncoderConstants.batch_max_size,
+    ):
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.pending = queue.Queue()
+        self.stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_seen_batch = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.closing = False
+        self.worker = threading.Thread(target=self.run, name="batch-encoder", daemon=True)
+        self.worker.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self.pending.put((text, future, time.perf_counter()))
+        return future
+
+    async def encode_async(self, text: str):
+        return await asyncio.wrap_future(self.submit(text))
+
+    async def encode_many_async(self, texts: List[str]):
+        """Queues all texts back to back, so they share forward passes of up to `max_batch_size`."""
+        futures = [self.submit(text) for text in texts]
+        return await asyncio.gather(*[asyncio.wrap_future(future) for future in futures])
+
+    def close(self, timeout=None):
+        """Encodes what is already queued, then stops the worker thread."""
+        self.closing = True
+        self.pending.put(None)
+        self.worker.join(timeout)
+
+    def collect(self):
+        first = self.pending.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def run(self):
+        while not (self.closing and self.pending.empty()):
+            batch = self.collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            texts: List[str] = [text for text, _, _ in batch]
+            try:
+                vectors = self.model.encode(texts, convert_to_numpy=True)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+            self.record(batch, started)
+
+    def record(self, batch, started):
+        waits = [started - enqueued_at for _, _, enqueued_at in batch]
+        with self.stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.max_seen_batch = max(self.max_seen_batch, len(batch))
+            self.total_queue_wait += sum(waits)
+            self.max_queue_wait = max(self.max_queue_wait, max(waits))
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_seen_batch,
+                "mean_queue_wait_ms": 1000 * self.total_queue_wait / self.items if self.items else 0.0,
+                "max_queue_wait_ms": 1000 * self.max_queue_wait,
+            }
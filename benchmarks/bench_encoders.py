@@ -0,0 +1,107 @@
+"""
+Compares the symptom encoder backends against the PyTorch reference.
+
+    python -m benchmarks.bench_encoders [--backends torch-int8 onnx onnx-int8] [--repeat 50]
+
+Each backend is loaded in a fresh process, so its load time and resident set
+are measured in isolation. Every backend must pick the same top-1 speciality
+as PyTorch for each symptom in fixtures/symptoms.json; the run fails otherwise.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from constants import APIConstants, practo_specializations
+
+
+SYMPTOMS = os.path.join(os.path.dirname(__file__), "fixtures", "symptoms.json")
+
+
+def resident_mib():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    # peak rather than current, but the best portable figure
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(backend, model_name, symptoms, repeat):
+    from encoders import load_encoder, model_key
+    from specialization_index import SpecializationIndex
+
+    before = resident_mib()
+    started = time.perf_counter()
+    model = load_encoder(model_name, backend)
+    load_seconds = time.perf_counter() - started
+    with tempfile.TemporaryDirectory() as index_root:
+        index = SpecializationIndex(model, model_key(model_name, backend), practo_specializations, index_root)
+        top1 = [index.match(text, top_k=1)[0][0] for text in symptoms]
+
+    latencies = []
+    for _ in range(repeat):
+        for text in symptoms:
+            started = time.perf_counter()
+            model.encode([text], convert_to_numpy=True)
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "top1": top1,
+        "load_s": load_seconds,
+        "rss_mib": resident_mib() - before,
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p95_ms": 1000 * latencies[int(len(latencies) * 0.95)],
+    }
+
+
+def run_isolated(backend, model_name, symptoms, repeat):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(measure, backend, model_name, symptoms, repeat).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=APIConstants.st_model)
+    parser.add_argument("--backends", nargs="+", default=["torch-int8", "onnx", "onnx-int8"])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(SYMPTOMS) as file:
+        symptoms = json.load(file)
+
+    reference = run_isolated("torch", args.model, symptoms, args.repeat)
+    print(f"{len(symptoms)} symptoms, model {args.model}\n")
+    print(f"  {'backend':<11} {'agree':>7} {'load s':>7} {'RSS MiB':>8} {'p50 ms':>7} {'p95 ms':>7}")
+    failed = []
+    for backend in ["torch"] + [backend for backend in args.backends if backend != "torch"]:
+        result = reference if backend == "torch" else run_isolated(backend, args.model, symptoms, args.repeat)
+        mismatches = [
+            (text, expected, got)
+            for text, expected, got in zip(symptoms, reference["top1"], result["top1"])
+            if expected != got
+        ]
+        agree = len(symptoms) - len(mismatches)
+        print(
+            f"  {backend:<11} {agree:>3}/{len(symptoms):<3} {result['load_s']:7.2f} {result['rss_mib']:8.0f} "
+            f"{result['p50_ms']:7.2f} {result['p95_ms']:7.2f}"
+        )
+        for text, expected, got in mismatches:
+            print(f"    {text!r}: {got} (torch: {expected})")
+        if mismatches:
+            failed.append(backend)
+
+    if failed:
+        raise SystemExit(f"top-1 speciality differs from torch for: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Micro-benchmark of the Practo HTML parsers over the saved fixtures.
+
+    python -m benchmarks.bench_parsers [--repeat 200]
+
+Every installed backend must produce exactly what the BeautifulSoup reference
+produces for each fixture; the run fails otherwise.
+"""
+import argparse
+import glob
+import os
+import time
+
+import parsers
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "practo")
+
+
+def load_fixtures():
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        name = os.path.basename(path)
+        kind = "listing" if name.startswith("listing") else "profile"
+        with open(path, "rb") as file:
+            fixtures.append((name, kind, file.read()))
+    return fixtures
+
+
+def time_parser(func, content, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(content)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"backends: {', '.join(parsers.BACKENDS)} (default: {parsers.DEFAULT_BACKEND})")
+    for name, kind, content in load_fixtures():
+        reference = parsers.BACKENDS["bs4"][kind](content)
+        baseline = time_parser(parsers.BACKENDS["bs4"][kind], content, args.repeat)
+        print(f"\n{name} ({len(content) / 1024:.1f} KiB)")
+        for backend, funcs in parsers.BACKENDS.items():
+            if funcs[kind](content) != reference:
+                raise SystemExit(f"{backend} output differs from bs4 on {name}")
+            seconds = baseline if backend == "bs4" else time_parser(funcs[kind], content, args.repeat)
+            print(f"  {backend:<11} {seconds * 1e6:9.1f} us/page  {1 / seconds:8.0f} pages/s  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
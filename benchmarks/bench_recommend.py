@@ -0,0 +1,335 @@
+"""
+Benchmarks the recommendation path against the offline stub of Places, Practo
+and Gemini (see stub_server.py).
+
+    python -m benchmarks.bench_recommend [--latency-ms 20] [--compare REF]
+
+Sections:
+  symptoms   encoding and ranking of fixtures/symptoms.json
+  cold       get_doctors on an empty store: places, listing, profiles, summaries, ingest
+  warm       get_doctors repeated once the store and caches are filled
+  ingest     DoctorStore.append throughput and partition reads, on disk and from the hot tier
+  endpoint   POST /find-doctors-by-symptoms through the ASGI app, under concurrency
+
+symptoms and endpoint need the encoder model and are skipped when
+sentence-transformers is not installed. Results are written to
+benchmarks/results/<commit>.json; --compare takes a commit or a path to an
+earlier result and prints the ratio of every metric to it.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.stub_server import StubServer
+
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results")
+SYMPTOMS = os.path.join(os.path.dirname(__file__), "fixtures", "symptoms.json")
+
+LOCATION = (28.56, 77.21)
+RADIUS = 5000
+SPECIALITY = "ophthalmologist"
+
+
+def percentiles(seconds):
+    ordered = sorted(seconds)
+    if not ordered:
+        return {}
+
+    def at(fraction):
+        return 1000 * ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000 * sum(ordered) / len(ordered),
+        "p50_ms": at(0.50),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": 1000 * ordered[-1],
+    }
+
+
+def have_encoder():
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def commit_id():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty.stdout.strip() else commit
+
+
+@contextlib.contextmanager
+def quiet():
+    # get_doctors prints the cities and localities it resolves on every call
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_symptoms(repeat):
+    from constants import APIConstants, practo_specializations
+    from cache import SymptomCache
+    from encoders import load_encoder, model_key
+    from specialization_index import SpecializationIndex
+
+    with open(SYMPTOMS) as file:
+        symptoms = json.load(file)
+    model = load_encoder()
+    with tempfile.TemporaryDirectory() as index_root:
+        started = time.perf_counter()
+        index = SpecializationIndex(model, model_key(), practo_specializations, index_root)
+        build_seconds = time.perf_counter() - started
+
+    cache = SymptomCache()
+    encode, lookup = [], []
+    for _ in range(repeat):
+        for text in symptoms:
+            started = time.perf_counter()
+            ranking = index.match(text)
+            encode.append(time.perf_counter() - started)
+            cache.set_ranking(text, index.fingerprint, ranking)
+            started = time.perf_counter()
+            cache.get_ranking(text, index.fingerprint)
+            lookup.append(time.perf_counter() - started)
+    return {
+        "model": f"{APIConstants.st_model}:{APIConstants.st_backend}",
+        "index_build_ms": 1000 * build_seconds,
+        "match": percentiles(encode),
+        "cached_lookup": percentiles(lookup),
+    }
+
+
+async def bench_get_doctors(stub, cold_runs, warm_runs):
+    from db import RecDB
+
+    cold, warm = [], []
+    returned = 0
+    with tempfile.TemporaryDirectory() as root:
+        for run in range(cold_runs):
+            db = RecDB(os.path.join(root, f"cold-{run}"))
+            started = time.perf_counter()
+            with quiet():
+                doctors = await db.get_doctors(*LOCATION, RADIUS, SPECIALITY)
+            cold.append(time.perf_counter() - started)
+            returned = len(doctors)
+
+        requests_before = dict(stub.requests)
+        for _ in range(warm_runs):
+            started = time.perf_counter()
+            with quiet():
+                await db.get_doctors(*LOCATION, RADIUS, SPECIALITY)
+            warm.append(time.perf_counter() - started)
+        upstream = {kind: count - requests_before.get(kind, 0) for kind, count in stub.requests.items()}
+
+    return (
+        {**percentiles(cold), "doctors": returned},
+        {**percentiles(warm), "upstream_requests": sum(upstream.values())},
+    )
+
+
+def synthetic_records(count, batch):
+    now = time.time()
+    return [
+        {
+            "name": f"Dr. Synthetic {i}",
+            "specializations": "Ophthalmologist",
+            "experience": i % 40,
+            "profile_image_url": f"https://imagesx.practo.com/providers/{i}.jpg",
+            "consultation_fee": 300 + i % 1200,
+            "summary": "Synthetic profile summary " * 8,
+            "generated_summary": "**Synthetic** generated summary " * 4,
+            "profile_url": f"https://www.practo.com/delhi/doctor/synthetic-{i}",
+            "address": f"{i}, Main Market",
+            "landmark": None,
+            "locality": ["saket", "dwarka", "rohini", "hauz-khas"][i % 4],
+            "city": "delhi",
+            "lat": 28.5 + (i % 100) / 1000,
+            "lng": 77.1 + (i % 100) / 1000,
+            "fetched_at": now,
+            "summarized_at": now,
+        }
+        for i in range(batch * count, batch * count + batch)
+    ]
+
+
+def bench_ingest(rows, batch_size):
+    from hot_tier import HotTier
+    from store import DoctorStore
+
+    with tempfile.TemporaryDirectory() as root:
+        store = DoctorStore(root)
+        batches = [synthetic_records(count, batch_size) for count in range(rows // batch_size)]
+        appends = []
+        started = time.perf_counter()
+        for batch in batches:
+            began = time.perf_counter()
+            store.append(batch, SPECIALITY)
+            appends.append(time.perf_counter() - began)
+        total = time.perf_counter() - started
+
+        reads = []
+        for _ in range(20):
+            began = time.perf_counter()
+            store.read("delhi", SPECIALITY)
+            reads.append(time.perf_counter() - began)
+
+        hot = HotTier(store)
+        hot.get("delhi", SPECIALITY)
+        hot_reads = []
+        for _ in range(200):
+            began = time.perf_counter()
+            hot.read("delhi", SPECIALITY, localities={"saket"})
+            hot_reads.append(time.perf_counter() - began)
+
+    return {
+        "rows": len(batches) * batch_size,
+        "rows_per_s": len(batches) * batch_size / total,
+        "append": percentiles(appends),
+        "disk_read": percentiles(reads),
+        "hot_read": percentiles(hot_reads),
+    }
+
+
+async def bench_endpoint(requests, concurrency):
+    import asgi
+    from db import RecDB
+    from recommender import Recommender
+
+    with open(SYMPTOMS) as file:
+        symptoms = json.load(file)
+
+    with tempfile.TemporaryDirectory() as root:
+        asgi.recommender = Recommender(RecDB(root))
+        async with asgi.app.test_app() as test_app:
+            client = test_app.test_client()
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies = []
+            failures = 0
+
+            async def call(i):
+                nonlocal failures
+                payload = {
+                    "symptoms": symptoms[i % len(symptoms)],
+                    "latitude": LOCATION[0],
+                    "longitude": LOCATION[1],
+                    "radius": RADIUS,
+                }
+                async with semaphore:
+                    began = time.perf_counter()
+                    response = await client.post("/find-doctors-by-symptoms", json=payload)
+                    await response.get_data()
+                    latencies.append(time.perf_counter() - began)
+                    failures += response.status_code != 200
+
+            started = time.perf_counter()
+            with quiet():
+                await asyncio.gather(*[call(i) for i in range(requests)])
+            total = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests_per_s": requests / total,
+        "failures": failures,
+        **percentiles(latencies),
+    }
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(current, reference_path):
+    with open(reference_path) as file:
+        reference = json.load(file)
+    print(f"\ncompared with {reference['commit']} ({os.path.basename(reference_path)})")
+    before = flatten(reference["results"])
+    for key, value in flatten(current["results"]).items():
+        if key in before and before[key]:
+            print(f"  {key:<36} {before[key]:12.3f} -> {value:12.3f}  {value / before[key]:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=20, help="delay the stub adds to every response")
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--warm-runs", type=int, default=200)
+    parser.add_argument("--ingest-rows", type=int, default=5000)
+    parser.add_argument("--ingest-batch", type=int, default=50)
+    parser.add_argument("--symptom-repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--compare", help="commit id or path of an earlier result")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    encoder = have_encoder()
+    with StubServer(latency_ms=args.latency_ms) as stub:
+        stub.point_constants()
+        if encoder:
+            results["symptoms"] = bench_symptoms(args.symptom_repeat)
+        results["cold"], results["warm"] = asyncio.run(bench_get_doctors(stub, args.cold_runs, args.warm_runs))
+        results["ingest"] = bench_ingest(args.ingest_rows, args.ingest_batch)
+        if encoder:
+            # run in a scratch directory: importing the app opens its default db/ under the cwd
+            cwd = os.getcwd()
+            with tempfile.TemporaryDirectory() as scratch:
+                sys.path.insert(0, cwd)
+                os.chdir(scratch)
+                try:
+                    results["endpoint"] = asyncio.run(bench_endpoint(args.requests, args.concurrency))
+                finally:
+                    os.chdir(cwd)
+                    sys.path.remove(cwd)
+        results["stub_requests"] = dict(stub.requests)
+
+    if not encoder:
+        print("sentence-transformers not installed: skipped symptoms and endpoint")
+
+    report = {
+        "commit": commit_id(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency_ms": args.latency_ms,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if not args.no_save:
+        os.makedirs(RESULTS, exist_ok=True)
+        path = os.path.join(RESULTS, f"{report['commit']}.json")
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"saved {path}")
+
+    if args.compare:
+        reference = args.compare if os.path.exists(args.compare) else os.path.join(RESULTS, f"{args.compare}.json")
+        compare(report, reference)
+
+
+if __name__ == "__main__":
+    main()
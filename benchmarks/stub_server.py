@@ -0,0 +1,124 @@
+"""
+Local stand-in for Google Places, Practo and Gemini that replays the recorded
+responses under fixtures/, so benchmarks run offline and repeatably.
+
+    with StubServer(latency_ms=20) as stub:
+        stub.point_constants()   # APIConstants URLs now target the stub
+"""
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from constants import APIConstants
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+PROFILE_FIXTURES = ["profile_complete.html", "profile_no_landmark.html", "profile_sparse.html"]
+
+
+def read_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), "rb") as file:
+        return file.read()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body: bytes, content_type):
+        time.sleep(self.server.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(self.path)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/places":
+            return self.reply(200, self.server.places, "application/json")
+        if url.path.startswith("/practo/"):
+            segments = url.path[len("/practo/"):].strip("/").split("/")
+            if len(segments) == 2:
+                page = int(parse_qs(url.query).get("page", ["1"])[0])
+                return self.reply(200, self.server.listing_page(page), "text/html")
+            if len(segments) >= 3 and segments[1] == "doctor":
+                return self.reply(200, self.server.profile(self.path), "text/html")
+        self.reply(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if urlsplit(self.path).path == "/gemini":
+            return self.reply(200, self.server.gemini, "application/json")
+        self.reply(404, b"not found", "text/plain")
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Serves `listing_pages` listing pages per (city, speciality), each with distinct
+    doctors, then empty pages; every profile path maps to one of the recorded
+    profiles. `latency_ms` is added to each response to stand in for the network.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency_ms: float = 20, listing_pages: int = 2, port: int = 0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency_ms / 1000
+        self.listing_pages = listing_pages
+        self.places = read_fixture("places", "nearby.json")
+        self.gemini = read_fixture("gemini", "generate.json")
+        self.listing = read_fixture("practo", "listing.html")
+        self.listing_empty = read_fixture("practo", "listing_empty.html")
+        self.profiles = [read_fixture("practo", name) for name in PROFILE_FIXTURES]
+        self.requests = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.saved_urls = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def listing_page(self, page):
+        if page > self.listing_pages:
+            return self.listing_empty
+        # the recorded page has practice ids 1000-1009; page 2 becomes 2000-2009 and so on
+        return self.listing.replace(b"practice_id=1", f"practice_id={page}".encode())
+
+    def profile(self, path):
+        digest = hashlib.md5(path.encode()).digest()
+        return self.profiles[digest[0] % len(self.profiles)]
+
+    def count(self, path):
+        kind = path.split("/")[1].split("?")[0]
+        with self.lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def point_constants(self):
+        self.saved_urls = (APIConstants.places_url, APIConstants.practo_url, APIConstants.gemini_url)
+        APIConstants.places_url = f"{self.url}/places"
+        APIConstants.practo_url = f"{self.url}/practo"
+        APIConstants.gemini_url = f"{self.url}/gemini"
+
+    def restore_constants(self):
+        if self.saved_urls is not None:
+            APIConstants.places_url, APIConstants.practo_url, APIConstants.gemini_url = self.saved_urls
+            self.saved_urls = None
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="stub-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.restore_constants()
+        self.shutdown()
+        self.server_close()
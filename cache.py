@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+from constants import CacheConstants
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after being set."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def normalize_symptoms(symptoms: str):
+    return " ".join(symptoms.lower().split())
+
+
+class SymptomCache(TTLCache):
+    """
+    Maps normalized symptom text to a resolved specialty ranking. Entries are
+    dropped as soon as the specialization index fingerprint (model name plus
+    specialization list) differs from the one they were computed against.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CacheConstants.symptom_cache_size,
+        ttl: float = CacheConstants.symptom_cache_ttl,
+    ):
+        super().__init__(max_size, ttl)
+        self.fingerprint = None
+
+    def check_fingerprint(self, fingerprint: str):
+        with self.lock:
+            if fingerprint != self.fingerprint:
+                self.entries.clear()
+                self.fingerprint = fingerprint
+
+    def get_ranking(self, symptoms: str, fingerprint: str):
+        self.check_fingerprint(fingerprint)
+        return self.get(normalize_symptoms(symptoms))
+
+    def set_ranking(self, symptoms: str, fingerprint: str, ranking):
+        self.check_fingerprint(fingerprint)
+        self.set(normalize_symptoms(symptoms), ranking)
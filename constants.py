@@ -5,6 +5,11 @@ class APIConstants:
     google_api = ""
     gemini_api = ""
     st_model = "all-MiniLM-L6-v2"
+    # one of encoders.BACKENDS: "torch", "torch-int8", "onnx", "onnx-int8"
+    st_backend = "torch"
+    places_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    practo_url = "https://www.practo.com"
+    gemini_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
 
 practo_specializations = [
     "ophthalmologist",
@@ -22,4 +27,79 @@ practo_specializations = [
     "pediatric-dentist",
     "endodontist",
     "implantologist"
-]
\ No newline at end of file
+]
+
+@dataclass
+class EncoderConstants:
+    batch_window_ms = 5
+    batch_max_size = 64
+    onnx_int8_file = "onnx/model_quint8_avx2.onnx"
+
+
+@dataclass
+class CacheConstants:
+    symptom_cache_size = 10000
+    symptom_cache_ttl = 6 * 60 * 60
+    locality_cell_degrees = 0.001
+    locality_ttl = 7 * 24 * 60 * 60
+    locality_memory_size = 50000
+
+
+@dataclass
+class HTTPConstants:
+    timeout = 10.0
+    connect_timeout = 5.0
+    max_connections = 100
+    max_keepalive_connections = 20
+    per_host_limit = 10
+    retries = 2
+    backoff = 0.25
+    user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+
+
+@dataclass
+class PractoConstants:
+    listing_depth = 3
+    listing_concurrency = 3
+
+
+@dataclass
+class PipelineConstants:
+    profile_concurrency = 10
+    summary_concurrency = 5
+    queue_size = 32
+
+
+@dataclass
+class SummaryConstants:
+    concurrency = 4
+
+
+@dataclass
+class HotTierConstants:
+    max_bytes = 256 * 1024 * 1024
+    check_interval = 1.0
+    shared_ipc = False
+
+
+@dataclass
+class ServerConstants:
+    shutdown_timeout = 30.0
+
+
+@dataclass
+class BatchConstants:
+    max_items = 1000
+    group_concurrency = 8
+
+
+@dataclass
+class JobConstants:
+    worker_concurrency = 2
+    poll_interval = 1.0
+    scan_interval = 60.0
+    refresh_after = 7 * 24 * 60 * 60
+    retry_after = 15 * 60
+    running_timeout = 30 * 60
+    record_max_age = 3 * 24 * 60 * 60
+    prewarm_limit = 20
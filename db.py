@@ -1,53 +1,88 @@
-import concurrent
-from concurrent.futures import ThreadPoolExecutor
-import re 
-import requests
-import json
-from bs4 import BeautifulSoup
+import math
+import numbers
+import re
+from dataclasses import dataclass
+
+import httpx
 
 import os
+import threading
+import time
 import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
-import concurrent.futures
 import asyncio
+from concurrent.futures import Future
+from functools import partial
 
 from typing import Optional, List
 
-from constants import APIConstants, practo_specializations
+from constants import APIConstants, HotTierConstants, JobConstants, PipelineConstants, PractoConstants, practo_specializations
+from store import (
+    DOCTOR_COLUMNS,
+    STORE_COLUMNS,
+    DoctorStore,
+    frame_to_records,
+    profile_stale_mask,
+    stale_mask,
+    unsummarized_mask,
+)
+from geo import haversine
+from hot_tier import HotTier
+from metrics import span
+from places import LocalityCache
+from http_client import http
+from pipeline import Pipeline, Stage
+from summaries import SummaryService, gemini_generate
+from jobs import JobQueue, RefreshWorker
+from parsers import format_string, parse_listing, parse_profile
+
+def parse_int(value) -> Optional[int]:
+    """Leading number of values like '12 Years' or '500'; None for 'N/A', NaN and missing values."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return None if math.isnan(value) else int(value)
+    match = re.search(r'\d+', str(value))
+    return int(match.group()) if match else None
+
+
+def parse_float(value) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
 
+
+@dataclass(slots=True)
 class Doctor:
-    def __init__ (
-        self,
-        name: Optional[str] = None,
-        specializations: Optional[str] = None,
-        experience: Optional[str] = None,
-        profile_image_url: Optional[str] = None,
-        consultation_fee: Optional[str] = None,
-        summary: Optional[str] = None,
-        generated_summary: Optional[str] = None,
-        profile_url: Optional[str] = None,
-        address: Optional[str] = None,
-        landmark: Optional[str] = None,
-        locality: Optional[str] = None,
-        city: Optional[str] = None,
-        lat: Optional[float] = None,
-        lng: Optional[float] = None
-    ):
-        self.name = name
-        self.specializations = specializations
-        self.experience = experience
-        self.profile_image_url = profile_image_url
-        self.consultation_fee = consultation_fee
-        self.summary = summary
-        self.generated_summary = generated_summary
-        self.profile_url = profile_url
-        self.address = address
-        self.landmark = landmark
-        self.locality = locality
-        self.city = city
-        self.lat = lat 
-        self.lng = lng
-    
+    name: Optional[str] = None
+    specializations: Optional[str] = None
+    experience: Optional[int] = None
+    profile_image_url: Optional[str] = None
+    consultation_fee: Optional[int] = None
+    summary: Optional[str] = None
+    generated_summary: Optional[str] = None
+    profile_url: Optional[str] = None
+    address: Optional[str] = None
+    landmark: Optional[str] = None
+    locality: Optional[str] = None
+    city: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    fetched_at: Optional[float] = None
+    summarized_at: Optional[float] = None
+
+    def __post_init__(self):
+        # scraped pages hand over text such as '12 Years' or 'N/A'; keep numbers typed
+        self.experience = parse_int(self.experience)
+        self.consultation_fee = parse_int(self.consultation_fee)
+        self.lat = parse_float(self.lat)
+        self.lng = parse_float(self.lng)
+        self.fetched_at = parse_float(self.fetched_at)
+        self.summarized_at = parse_float(self.summarized_at)
+
     def to_json(self):
         return {
             "name": self.name,
@@ -66,13 +101,16 @@ class Doctor:
             "lng": self.lng
         }
 
-
-def format_string(string: str):
-    return string.lower().replace(" ", "-")
+    def to_record(self):
+        return {
+            **self.to_json(),
+            "fetched_at": self.fetched_at,
+            "summarized_at": self.summarized_at
+        }
 
 
-def find_localities_google(latitude, longitude, radius=500):
-    base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+async def find_localities_google(latitude, longitude, radius=500, transport=http.get):
+    base_url = APIConstants.places_url
     params = {
         "key": APIConstants.google_api,
         "location": f"{latitude},{longitude}",
@@ -80,7 +118,13 @@ def find_localities_google(latitude, longitude, radius=500):
         "keyword": "business OR landmark OR locality"
     }
 
-    response = requests.get(base_url, params=params)
+    with span("places_upstream") as timing:
+        try:
+            response = await transport(base_url, params=params)
+        except httpx.HTTPError as e:
+            timing.set(error=type(e).__name__)
+            return {"error": f"Error: {e!r}"}
+        timing.set(status=response.status_code)
     if response.status_code == 200:
         results = response.json().get("results", [])
         localities = []
@@ -101,15 +145,18 @@ def find_localities_google(latitude, longitude, radius=500):
         return {"error": f"Error: {response.status_code}, {response.text}"}
 
 
-def find_doctors_google(latitude, longitude, radius=500):
-    base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+async def find_doctors_google(latitude, longitude, radius=500):
+    base_url = APIConstants.places_url
     params = {
         "key": APIConstants.google_api,
         "location": f"{latitude},{longitude}",
         "radius": radius,
         "keyword": "doctor",
     }
-    response = requests.get(base_url, params=params)
+    try:
+        response = await http.get(base_url, params=params)
+    except httpx.HTTPError as e:
+        return {"error": f"Error: {e!r}"}
     if response.status_code == 200:
         results = response.json().get("results", [])
         doctors = []
@@ -134,131 +181,84 @@ def find_doctors_google(latitude, longitude, radius=500):
     else:
         return {"error": f"Error: {response.status_code}, {response.text}"}
 
-def practo_search(city, speciality):
-    doctors = []
-    for page in range(1, 4):
-        url = f"https://www.practo.com/{city}/{speciality}?page={page}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            doctor_cards = soup.find_all('div', class_='listing-doctor-card')
-            if not doctor_cards:
-                break
-            for card in doctor_cards:
-                doctor_name_tag = card.find('h2', {'data-qa-id': 'doctor_name'})
-                doctor_name = doctor_name_tag.get_text(strip=True) if doctor_name_tag else 'N/A'
-
-                experience_tag = card.find('div', {'data-qa-id': 'doctor_experience'})
-                doctor_experience = experience_tag.get_text(strip=True) if experience_tag else 'N/A'
-
-                locality_tag = card.find('span', {'data-qa-id': 'practice_locality'})
-                practice_locality = locality_tag.get_text(strip=True) if locality_tag else 'N/A'
-
-                city_tag = card.find('span', {'data-qa-id': 'practice_city'})
-                practice_city = city_tag.get_text(strip=True) if city_tag else 'N/A'
-
-                profile_link_tag = card.find('a', href=True)
-                profile_link = f"https://www.practo.com{profile_link_tag['href']}" if profile_link_tag else 'N/A'
-
-                doctors.append(Doctor(
-                    name=doctor_name,
-                    experience=doctor_experience,
-                    locality=format_string(practice_locality[:-1]),
-                    city=format_string(practice_city),
-                    profile_url=profile_link
-                ))
-        else:
-            break
-    return doctors
-
-
-def fetch_doctor_profile(doctor: Doctor):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
-    response = requests.get(doctor.profile_url, headers=headers)
+async def fetch_listing_page(city, speciality, page):
+    url = f"{APIConstants.practo_url}/{city}/{speciality}?page={page}"
+    with span("practo_listing", city=city, page=page) as timing:
+        try:
+            response = await http.get(url)
+        except httpx.HTTPError as e:
+            print(f"Failed to retrieve listing page {url}: {e!r}")
+            timing.set(error=type(e).__name__)
+            return []
+        timing.set(status=response.status_code)
+        if response.status_code != 200:
+            return []
+        fields = await asyncio.to_thread(parse_listing, response.content)
+        timing.set(doctors=len(fields))
+        return [Doctor(**doctor) for doctor in fields]
+
+
+async def practo_listing(
+    city,
+    speciality,
+    depth=PractoConstants.listing_depth,
+    concurrency=PractoConstants.listing_concurrency,
+):
+    """
+    Yields doctors from the first `depth` listing pages as each page arrives.
+    Page 1 is fetched alone, so an empty or unknown listing costs one request;
+    when it has doctors, up to `concurrency` of the remaining pages are fetched at
+    once, and once a page comes back empty (or fails) no page after it is requested.
+    """
+    first = await fetch_listing_page(city, speciality, 1)
+    for doctor in first:
+        yield doctor
+    if not first:
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    last_page = depth
+
+    async def fetch(page):
+        async with semaphore:
+            if page > last_page:
+                return page, []
+            return page, await fetch_listing_page(city, speciality, page)
+
+    tasks = [asyncio.create_task(fetch(page)) for page in range(2, depth + 1)]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            page, doctors = await next_page
+            if not doctors:
+                last_page = min(last_page, page - 1)
+                continue
+            if page > last_page:
+                continue
+            for doctor in doctors:
+                yield doctor
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def fetch_doctor_profile(doctor: Doctor):
+    with span("profile_fetch") as timing:
+        try:
+            response = await http.get(doctor.profile_url)
+        except httpx.HTTPError as e:
+            print(f"Failed to retrieve profile data: {e!r}")
+            timing.set(error=type(e).__name__)
+            return None
+        timing.set(status=response.status_code)
     if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        name_tag = soup.find('h1', {'data-qa-id': 'doctor-name'})
-        doctor_name = name_tag.get_text(strip=True) if name_tag else 'N/A'
-
-        specializations_tag = soup.find('div', {'data-qa-id': 'doctor-specializations'})
-        if specializations_tag:
-            specialization_text = specializations_tag.get_text(strip=True)
-            experience_match = re.search(r'(\d+)\s*Years', specialization_text)
-            experience = experience_match.group(1) + ' Years' if experience_match else 'N/A'
-            specializations = re.sub(r'\d+\s*Years.*', '', specialization_text).strip()
-        else:
-            specializations = 'N/A'
-            experience = 'N/A'
-
-        image_tag = soup.find('img', {'data-qa-id': 'doctor-profile-image'})
-        if image_tag:
-            full_image_url = image_tag['src']
-            profile_image_url = full_image_url.split('?')[0]
-        else:
-            profile_image_url = 'N/A'
-
-        fee_tag = soup.find('div', class_='u-f-right u-large-font u-bold u-valign--middle u-lheight-normal')
-        if fee_tag:
-            fee_text = fee_tag.get_text(strip=True)
-            consultation_fee = re.sub(r'[^\d]', '', fee_text)
-        else:
-            consultation_fee = 'N/A'
-
-        summary_tag = soup.find('div', {'data-qa-id': 'doctor-summary'})
-        if summary_tag:
-            more_button = summary_tag.find('span', {'data-qa-id': 'summary-more'})
-            if more_button:
-                more_button.extract()
-            doctor_summary = summary_tag.get_text(strip=True)
-        else:
-            doctor_summary = 'N/A'
-
-        directions_tag = soup.find('a', {'data-qa-id': 'get-directions'})
-        if directions_tag and 'href' in directions_tag.attrs:
-            directions_url = directions_tag['href']
-            lat_lng_match = re.search(r'place/([-.\d]+),([-.\d]+)', directions_url)
-            if lat_lng_match:
-                latitude = lat_lng_match.group(1)
-                longitude = lat_lng_match.group(2)
-            else:
-                latitude = None
-                longitude = None
-        else:
-            latitude = None
-            longitude = None
-
-        address_tag = soup.find('p', {'class': 'c-profile--clinic__address', 'data-qa-id': 'clinic-address'})
-        clinic_address = address_tag.get_text(strip=True) if address_tag else 'N/A'
-
-       
-        address = clinic_address
-        landmark = None
-
-        if "Landmark: " in clinic_address:
-            parts = clinic_address.split("Landmark: ")
-            address = parts[0].strip()
-            landmark = parts[1].strip()
-
+        fields = await asyncio.to_thread(parse_profile, response.content)
         return Doctor(
-            name=doctor_name,
-            specializations=specializations,
-            experience=experience,
-            profile_image_url=profile_image_url,
-            consultation_fee=consultation_fee,
-            generated_summary = doctor_summary,
+            **fields,
+            generated_summary=fields['summary'],
             profile_url=doctor.profile_url,
-            address=address,
-            landmark=landmark,
             locality=doctor.locality,
             city=doctor.city,
-            lat=latitude,
-            lng=longitude,
+            fetched_at=time.time(),
         )
         
     else:
@@ -276,195 +276,253 @@ def prompt_generate(doctor: Doctor):
         "### Input: \n"
         f"Doctor's name: {doctor.name} \n"
         f"Doctor's specializations: {doctor.specializations} \n"
-        f"Doctor's experience: {doctor.experience} \n"
+        f"Doctor's experience in years: {doctor.experience} \n"
         f"Doctor's self summary: {doctor.summary} \n"
         f"Doctor's consultation fee in Rupees: {doctor.consultation_fee} \n"
         "### Output: \n"
     )
     return prompt
 
-def doctor_summary(doctor: Doctor):
+async def doctor_summary(doctor: Doctor, service: Optional[SummaryService] = None):
     doctor_prompt = prompt_generate(doctor)
-    base_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
     try:
-        payload = {
-            "contents": [{
-                "parts": [{"text": doctor_prompt}]
-            }]
-        }
-        headers = {
-            "Content-Type": "application/json"
-        }
-        response = requests.post(
-            f"{base_url}?key={APIConstants.gemini_api}",
-            headers=headers,
-            data=json.dumps(payload)
-        )
-        if response.status_code == 200:
-            result = response.json()
-            if "candidates" in result and len(result["candidates"]) > 0:
-                generated_text = result["candidates"][0]["content"]["parts"][0]["text"]
-                doctor.generated_summary = generated_text
-                return doctor
+        if service is not None:
+            generated_text = await service.generate(doctor_prompt)
         else:
-            return doctor
+            result = await gemini_generate(doctor_prompt)
+            generated_text = result[0] if result else None
+        if generated_text is not None:
+            doctor.generated_summary = generated_text
+            doctor.summarized_at = time.time()
     except Exception as e:
-        return f"An error occurred while generating content: {e}"
+        # keep the fetched profile; without summarized_at it is summarized again on refresh
+        print(f"An error occurred while generating content: {e!r}")
+    return doctor
+
+def with_distances(records, lat, lng):
+    """Adds `distance_m` from (lat, lng) to every record, as the geo index does; None for doctors without coordinates."""
+    for record in records:
+        located = record['lat'] is not None and record['lng'] is not None
+        record['distance_m'] = float(haversine(lat, lng, record['lat'], record['lng'])) if located else None
+    return records
+
 
 class RecDB:
-    def __init__(self, db_root="db"):
+    def __init__(self, db_root="db", places_transport=http.get, gemini_transport=http.post):
         self.db_root = db_root
         self.doctors_folder = os.path.join(self.db_root, "doctors")
         self.customers_folder = os.path.join(self.db_root, "customers")
+        self.store = DoctorStore(self.doctors_folder)
+        self.hot = HotTier(
+            self.store,
+            ipc_root=os.path.join(self.db_root, "cache", "arrow") if HotTierConstants.shared_ipc else None,
+        )
+        self.summaries = SummaryService(
+            os.path.join(self.db_root, "cache", "summaries.sqlite"),
+            transport=gemini_transport,
+        )
+        self.jobs = JobQueue(os.path.join(self.db_root, "jobs.sqlite"))
+        self.refresh_worker = RefreshWorker(self.jobs, self.refresh)
+        summary_stage = Stage(
+            "summary",
+            partial(doctor_summary, service=self.summaries),
+            PipelineConstants.summary_concurrency,
+            keep=lambda doctor: isinstance(doctor, Doctor),
+        )
+        self.pipeline = Pipeline([
+            Stage("profile", fetch_doctor_profile, PipelineConstants.profile_concurrency),
+            summary_stage,
+        ])
+        self.summary_pipeline = Pipeline([summary_stage])
+        self.locality_cache = LocalityCache(
+            partial(find_localities_google, transport=places_transport),
+            os.path.join(self.db_root, "cache", "places.sqlite"),
+        )
+        # (city, speciality) -> Future set once the request scraping it inline has stored its doctors
+        self.scrapes = {}
+        self.scrapes_lock = threading.Lock()
 
-    def create_city_folder(self, city_name):
-        city_path = os.path.join(self.doctors_folder, city_name)
-        os.makedirs(city_path, exist_ok=True)
-        return city_path
-    
-    def specialization_folder(self, city_name, specialization):
-        city_path = self.create_city_folder(city_name)
-        specialization_path = os.path.join(city_path, specialization)
-        os.makedirs(specialization_path, exist_ok=True)
-        return specialization_path
-    
     async def add_doctors(self, doctors: List[Doctor], speciality):
-        for doctor in doctors:
-            path = self.specialization_folder(doctor.city, speciality)
-            path += "/data.parquet"
-            if doctor.city == "gurugram":
-                print(doctor.to_json())
-            try:
-                df = pd.read_parquet(path)
-            except FileNotFoundError:
-                df = pd.DataFrame(
-                    columns=[
-                        'name', 
-                        'specializations',
-                        'experience', 
-                        'profile_image_url', 
-                        'consultation_fee', 
-                        'summary', 
-                        'generated_summary', 
-                        'profile_url', 
-                        'address', 
-                        'landmark', 
-                        'locality', 
-                        'city', 
-                        'lat', 
-                        'lng'
-                        ]
-                )
-            df = pd.concat([df, pd.DataFrame([doctor.to_json()])], ignore_index=True)
-            df.to_parquet(path, index=False)
-
-    async def work_saving_doctors(self, doctors: List[Doctor], speciality):
-        final_doctors = []
-        def fetch_profiles(doctor: Doctor):
-            return fetch_doctor_profile(doctor)
-
-        def add_summary(doctor: Doctor):
-            doctor: Doctor = doctor_summary(doctor)  
-            return doctor
-
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_profiles = [executor.submit(fetch_profiles, doctor) for doctor in doctors]
-            intermediate_doctors = []
-            for future in concurrent.futures.as_completed(future_to_profiles):
-                intermediate_doctors.append(future.result())
-
-            future_to_summaries = [executor.submit(add_summary, doctor) for doctor in intermediate_doctors]
-            for future in concurrent.futures.as_completed(future_to_summaries):
-                final_doctors.append(future.result())
-
-        await self.add_doctors(final_doctors, speciality)
-        
+        records = [doctor.to_record() for doctor in doctors if isinstance(doctor, Doctor)]
+        if not records:
+            return
+        loop = asyncio.get_running_loop()
+        with span("ingest", doctors=len(records)):
+            await loop.run_in_executor(None, self.store.append, records, speciality)
+
+    async def refresh(self, city, speciality):
+        """
+        Revalidates one (city, speciality). Doctors new to the listing and stored doctors
+        with a stale profile go through the whole profile -> summary pipeline, stored
+        doctors with a fresh profile but no summary are only summarized, and fresh
+        complete rows are left untouched.
+        """
+        stored = await asyncio.to_thread(self.store.read, city, speciality, columns=STORE_COLUMNS)
+        known = set()
+        refetch = []
+        resummarize = []
+        if stored is not None:
+            known = set(stored['profile_url'])
+            profile_stale = profile_stale_mask(stored, JobConstants.record_max_age)
+            refetch = [Doctor(**record) for record in frame_to_records(stored[profile_stale])]
+            resummarize = [
+                Doctor(**record)
+                for record in frame_to_records(stored[~profile_stale & unsummarized_mask(stored)])
+            ]
+
+        async def profile_pending():
+            for doctor in refetch:
+                yield doctor
+            async for doctor in practo_listing(city, speciality):
+                if doctor.profile_url not in known:
+                    yield doctor
+
+        fetched, summarized = await asyncio.gather(
+            self.pipeline.collect(profile_pending()),
+            self.summary_pipeline.collect(resummarize),
+        )
+        await self.add_doctors(fetched + summarized, speciality)
+
+    def served(self, df: pd.DataFrame, speciality):
+        """
+        Counts a request for every city in `df`, which feeds the pre-warm ordering, and
+        revalidates it. Both stay in memory on repeat requests; see JobQueue.
+        """
+        cities = df['city'].dropna().unique()
+        self.jobs.record_requests([(city, speciality) for city in cities])
+        self.revalidate(df, speciality)
+
+    def revalidate(self, df: pd.DataFrame, speciality):
+        """Schedules a refresh for every city with stale or incomplete rows in `df`."""
+        for city in df.loc[stale_mask(df, JobConstants.record_max_age), 'city'].dropna().unique():
+            self.jobs.enqueue(city, speciality, min_interval=JobConstants.retry_after)
+
+    def claim_scrape(self, city, speciality):
+        """Returns (future, True) for the request that scrapes a combination inline, (future, False) for those waiting on it."""
+        with self.scrapes_lock:
+            future = self.scrapes.get((city, speciality))
+            if future is not None:
+                return future, False
+            future = self.scrapes[(city, speciality)] = Future()
+            return future, True
+
+    def finish_scrape(self, city, speciality, future):
+        with self.scrapes_lock:
+            self.scrapes.pop((city, speciality), None)
+        future.set_result(None)
+
+    def start_background(self):
+        self.refresh_worker.start()
+
+    def stop_background(self, timeout=None):
+        self.refresh_worker.stop(timeout)
+
+    def nearby_doctors(self, lat, lng, rad, speciality):
+        return self.hot.nearby(speciality, float(lat), float(lng), float(rad))
 
     async def get_doctors(self, lat, lng, rad, speciality):
-        list_localities = find_localities_google(lat, lng, rad)\
-
-        cities = set()
+        loop = asyncio.get_event_loop()
+        with span("geo_index") as timing:
+            nearby = await loop.run_in_executor(None, self.nearby_doctors, lat, lng, rad, speciality)
+            timing.set(doctors=len(nearby) if nearby is not None else 0)
+        if nearby is not None and nearby['generated_summary'].notna().any():
+            # serve what is stored right away; stale or incomplete rows are revalidated in the background
+            await asyncio.to_thread(self.served, nearby, speciality)
+            summarized = nearby['generated_summary'].notna()
+            return frame_to_records(nearby.loc[summarized, DOCTOR_COLUMNS + ['distance_m']])
+
+        list_localities = await self.locality_cache.get(lat, lng, rad)
+        if isinstance(list_localities, dict):
+            print(list_localities["error"])
+            list_localities = []
+
+        cities = []
         localities = set()
         for locality in list_localities:
-            cities.add(locality['city'])
+            if locality['city'] not in cities:
+                cities.append(locality['city'])
             localities.add(locality['locality'])
 
         print(cities)
         print(localities)
 
-        def fetch_doctors_by_city(city):
-            locality_doctors = []
-            other_loc_doctors = []
-            def search_doctor(city, speciality):
-                path = self.specialization_folder(city, speciality)
-                path += "/data.parquet"
-                try:
-                    df = pd.read_parquet(path)
-                    doctors = []
-                    for _, row in df.iterrows():
-                        doctor = Doctor(
-                            name=row.get("name"),
-                            specializations=row.get("specializations"),
-                            experience=row.get("experience"),
-                            profile_image_url=row.get("profile_image_url"),
-                            consultation_fee=row.get("consultation_fee"),
-                            summary=row.get("summary"),
-                            generated_summary=row.get("generated_summary"),
-                            profile_url=row.get("profile_url"),
-                            address=row.get("address"),
-                            landmark=row.get("landmark"),
-                            locality=row.get("locality"),
-                            city=row.get("city"),
-                            lat=row.get("lat"),
-                            lng=row.get("lng")
-                        )
-                        doctors.append(doctor)
-                    return doctors
-                except FileNotFoundError:
-                    doctors: List[Doctor] = practo_search(city, speciality)
-                    return doctors
-                
-            doctors: List[Doctor] = search_doctor(city, speciality) 
-            for doctor in doctors:
+        # combinations this request scrapes inline, and those whose listing had doctors
+        scrapes = {}
+        listed = set()
+
+        async def read_city(city):
+            with span("parquet_read", city=city) as timing:
+                df = await asyncio.to_thread(self.hot.read, city, speciality, columns=STORE_COLUMNS, localities=localities)
+                timing.set(rows=len(df) if df is not None else 0)
+            return df
+
+        async def fetch_doctors_by_city(city, pending: asyncio.Queue):
+            self.jobs.record_request(city, speciality)
+            df = await read_city(city)
+            if df is not None:
+                await asyncio.to_thread(self.revalidate, df, speciality)
+                return df.loc[df['generated_summary'].notna(), DOCTOR_COLUMNS]
+
+            future, leader = self.claim_scrape(city, speciality)
+            if not leader:
+                # another request is scraping the combination inline; serve what it stores
+                with span("scrape_wait", city=city):
+                    await asyncio.wait([asyncio.wrap_future(future)])
+                df = await read_city(city)
+                return df.loc[df['generated_summary'].notna(), DOCTOR_COLUMNS] if df is not None else None
+
+            # combinations seen before are filled in by the refresh worker, never scraped inline
+            try:
+                reserved = await asyncio.to_thread(self.jobs.reserve, city, speciality)
+            except BaseException:
+                self.finish_scrape(city, speciality, future)
+                raise
+            if not reserved:
+                self.finish_scrape(city, speciality, future)
+                await asyncio.to_thread(self.jobs.enqueue, city, speciality)
+                return None
+
+            scrapes[city] = future
+            async for doctor in practo_listing(city, speciality):
+                listed.add(city)
                 if doctor.locality in localities:
-                    locality_doctors.append(doctor)
-                else:
-                    other_loc_doctors.append(doctor)
-            return locality_doctors, other_loc_doctors
-
-        def fetch_profiles(doctor: Doctor):
-            return fetch_doctor_profile(doctor)
-
-        def add_summary(doctor: Doctor):
-            doctor: Doctor = doctor_summary(doctor)  
-            return doctor
-
-        all_other_doctors = []
-        all_locality_doctors = []
-        final_doctors = []
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            loop = asyncio.get_event_loop()
-            future_to_city = {loop.run_in_executor(executor, fetch_doctors_by_city, city): city for city in cities}
-            
-            for future in asyncio.as_completed(future_to_city):
-                result = await future
-                all_locality_doctors.extend(result[0])
-                all_other_doctors.extend(result[1])
-        
-
-            if all_locality_doctors and all_locality_doctors[0].generated_summary is not None:
-                return [doctor.to_json() for doctor in all_locality_doctors]
-
-            future_to_profiles = [loop.run_in_executor(executor, fetch_profiles, doctor) for doctor in all_locality_doctors]
-            intermediate_doctors = [await future for future in asyncio.as_completed(future_to_profiles)]
-
-            future_to_summaries = [loop.run_in_executor(executor, add_summary, doctor) for doctor in intermediate_doctors]
-            final_doctors = [await future for future in asyncio.as_completed(future_to_summaries)]
-
-        asyncio.create_task(self.add_doctors(final_doctors, speciality))
-        asyncio.create_task(self.work_saving_doctors(all_other_doctors, speciality))
+                    await pending.put(doctor)
+            return None
+
+        # locality doctors enter the profile -> summary pipeline while listings are still streaming
+        pending = asyncio.Queue()
+        searches = asyncio.ensure_future(asyncio.gather(*[fetch_doctors_by_city(city, pending) for city in cities]))
+        searches.add_done_callback(lambda _: pending.put_nowait(None))
+
+        async def pending_doctors():
+            while True:
+                doctor = await pending.get()
+                if doctor is None:
+                    return
+                yield doctor
+
+        stored = False
+        try:
+            with span("pipeline") as timing:
+                final_doctors = await self.pipeline.collect(pending_doctors())
+                timing.set(doctors=len(final_doctors))
+
+            stored_frames = [frame for frame in searches.result() if frame is not None]
+            stored_records = frame_to_records(pd.concat(stored_frames, ignore_index=True)) if stored_frames else []
+
+            if final_doctors:
+                await self.add_doctors(final_doctors, speciality)
+            stored = True
+        finally:
+            for city, future in scrapes.items():
+                self.finish_scrape(city, speciality, future)
+                # the rest of a listing with doctors is completed off the request path, as is a failed scrape
+                try:
+                    await asyncio.to_thread(self.jobs.release, city, speciality, city in listed or not stored)
+                except Exception as e:
+                    print(f"Releasing the scrape of {city}/{speciality} failed: {e!r}")
 
-        return [doctor.to_json() for doctor in final_doctors]
+        return with_distances(stored_records + [doctor.to_json() for doctor in final_doctors], float(lat), float(lng))
 
     
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+from sentence_transformers import SentenceTransformer
+
+from constants import APIConstants, EncoderConstants
+
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+def model_key(model_name: str = APIConstants.st_model, backend: str = APIConstants.st_backend):
+    """Identifies the embedding space; vectors from different backends are not interchangeable."""
+    return model_name if backend == "torch" else f"{model_name}:{backend}"
+
+
+def load_encoder(model_name: str = APIConstants.st_model, backend: str = APIConstants.st_backend):
+    """
+    Loads `model_name` for CPU inference. Every backend returns a SentenceTransformer,
+    so callers keep using `encode(texts, convert_to_numpy=True)` whichever runs underneath.
+
+    torch       the PyTorch model as published
+    torch-int8  PyTorch with Linear layers dynamically quantized to int8
+    onnx        ONNX Runtime on the exported fp32 graph
+    onnx-int8   ONNX Runtime on the int8 graph named by EncoderConstants.onnx_int8_file
+    """
+    if backend == "torch":
+        return SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        # in place, so the fp32 weights are released instead of kept alongside the copy
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(
+            model_name,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={"file_name": EncoderConstants.onnx_int8_file},
+        )
+    raise ValueError(f"Unknown encoder backend {backend!r}, expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,26 @@
+import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def clean(value):
+    # NaN is not valid JSON; browsers reject the bare token Python's json emits
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {key: clean(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [clean(item) for item in value]
+    return value
+
+
+def dumps(value) -> bytes:
+    """Serializes API responses, with orjson when it is installed and the json module otherwise."""
+    if orjson is not None:
+        # orjson writes NaN as null and handles numpy scalars natively
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(clean(value), separators=(",", ":"), default=lambda item: item.item()).encode("utf-8")
@@ -0,0 +1,77 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+EARTH_RADIUS_M = 6371008.8
+METRES_PER_DEGREE = 111320.0
+
+
+def haversine(lat, lng, lats: np.ndarray, lngs: np.ndarray):
+    """Great-circle distance in metres from (lat, lng) to every (lats[i], lngs[i])."""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class GeoIndex:
+    """
+    Buckets doctors into a fixed lat/lng grid so a radius query only computes
+    haversine distances for the cells overlapping the search circle. The index
+    holds row positions into `df`, which it references rather than copies.
+    """
+
+    def __init__(self, df: pd.DataFrame, cell_degrees: float = 0.05):
+        lats = pd.to_numeric(df['lat'], errors='coerce')
+        lngs = pd.to_numeric(df['lng'], errors='coerce')
+        located = (lats.notna() & lngs.notna()).to_numpy()
+
+        self.df = df
+        self.rows = np.flatnonzero(located)
+        self.lats = lats[located].to_numpy(dtype=np.float64)
+        self.lngs = lngs[located].to_numpy(dtype=np.float64)
+        self.cell_degrees = cell_degrees
+
+        buckets = defaultdict(list)
+        rows = np.floor(self.lats / cell_degrees).astype(np.int64)
+        cols = np.floor(self.lngs / cell_degrees).astype(np.int64)
+        for position, cell in enumerate(zip(rows.tolist(), cols.tolist())):
+            buckets[cell].append(position)
+        self.buckets = {cell: np.array(positions, dtype=np.int64) for cell, positions in buckets.items()}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def nbytes(self):
+        """Memory held by the index itself, excluding the referenced frame."""
+        buckets = sum(positions.nbytes for positions in self.buckets.values())
+        return self.rows.nbytes + self.lats.nbytes + self.lngs.nbytes + buckets
+
+    def candidates(self, lat, lng, radius):
+        lat_span = radius / METRES_PER_DEGREE
+        lng_span = radius / (METRES_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        row_range = range(math.floor((lat - lat_span) / self.cell_degrees), math.floor((lat + lat_span) / self.cell_degrees) + 1)
+        col_range = range(math.floor((lng - lng_span) / self.cell_degrees), math.floor((lng + lng_span) / self.cell_degrees) + 1)
+
+        if len(row_range) * len(col_range) > len(self.buckets):
+            cells = [cell for cell in self.buckets if cell[0] in row_range and cell[1] in col_range]
+        else:
+            cells = [(row, col) for row in row_range for col in col_range if (row, col) in self.buckets]
+        if not cells:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.buckets[cell] for cell in cells])
+
+    def query(self, lat, lng, radius) -> pd.DataFrame:
+        """Rows within `radius` metres of (lat, lng), nearest first, with a `distance_m` column."""
+        positions = self.candidates(lat, lng, radius)
+        distances = haversine(lat, lng, self.lats[positions], self.lngs[positions])
+        within = distances <= radius
+        positions, distances = positions[within], distances[within]
+        order = np.argsort(distances, kind='stable')
+
+        result = self.df.iloc[self.rows[positions[order]]].reset_index(drop=True)
+        result['distance_m'] = distances[order]
+        return result
@@ -0,0 +1,246 @@
+import glob
+import os
+import threading
+import time
+import uuid
+import math
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from typing import Iterable, List, Optional
+
+from constants import HotTierConstants
+from geo import METRES_PER_DEGREE, GeoIndex
+from store import DoctorStore, frame_to_table
+
+
+class Partition:
+    __slots__ = ("frame", "index", "version", "checked_at", "size")
+
+    def __init__(self, frame: Optional[pd.DataFrame], version, checked_at: float):
+        self.frame = frame
+        self.index = GeoIndex(frame) if frame is not None else None
+        self.version = version
+        self.checked_at = checked_at
+        self.size = 0
+        if frame is not None:
+            self.size = int(frame.memory_usage(index=True, deep=True).sum()) + self.index.nbytes()
+
+    def bounds(self):
+        """(min_lat, max_lat, min_lng, max_lng) of the located doctors, None when there are none."""
+        if self.index is None or not len(self.index):
+            return None
+        return self.index.lats.min(), self.index.lats.max(), self.index.lngs.min(), self.index.lngs.max()
+
+
+def circle_overlaps(bounds, lat, lng, radius):
+    lat_span = radius / METRES_PER_DEGREE
+    lng_span = radius / (METRES_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    min_lat, max_lat, min_lng, max_lng = bounds
+    return (
+        lat + lat_span >= min_lat and lat - lat_span <= max_lat
+        and lng + lng_span >= min_lng and lng - lng_span <= max_lng
+    )
+
+
+class HotTier:
+    """
+    Keeps recently used (city, speciality) tables in memory, evicting the least
+    recently used ones once their combined size passes `max_bytes`. Each table
+    carries its own GeoIndex over that same frame, counted in that size and evicted
+    with it.
+
+    A cached partition is served without touching the filesystem. Writes made
+    through this process's DoctorStore drop it immediately; writes from other
+    processes are noticed by comparing the partition directory's mtime, which is
+    checked at most once every `check_interval` seconds per partition.
+
+    With `ipc_root` set, each loaded partition version is also written as an
+    uncompressed Arrow IPC file there, and other processes memory-map that file
+    instead of decoding the parquet parts again, so their Arrow-backed columns
+    share the same pages.
+
+    The bounding box of every partition's doctors outlives eviction, so a radius
+    query only loads the partitions it can actually match.
+    """
+
+    def __init__(
+        self,
+        store: DoctorStore,
+        max_bytes: int = HotTierConstants.max_bytes,
+        check_interval: float = HotTierConstants.check_interval,
+        ipc_root: Optional[str] = None,
+    ):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.ipc_root = ipc_root
+        self.partitions = OrderedDict()
+        self.city_lists = {}
+        self.bounds = {}
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+        store.listeners.append(self.invalidate)
+
+    def invalidate(self, city, speciality):
+        with self.lock:
+            partition = self.partitions.get((city, speciality))
+            if partition is not None:
+                partition.checked_at = float("-inf")
+            self.city_lists.pop(speciality, None)
+            self.bounds.pop((city, speciality), None)
+
+    def ipc_path(self, city, speciality, version):
+        return os.path.join(self.ipc_root, city, speciality, f"{version}.arrow")
+
+    def load_ipc(self, city, speciality, version) -> Optional[pd.DataFrame]:
+        try:
+            source = pa.memory_map(self.ipc_path(city, speciality, version))
+        except FileNotFoundError:
+            return None
+        return ipc.open_file(source).read_all().to_pandas()
+
+    def save_ipc(self, city, speciality, version, frame: pd.DataFrame):
+        path = self.ipc_path(city, speciality, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        table = frame_to_table(frame)
+        with pa.OSFile(tmp, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+        for old in glob.glob(os.path.join(os.path.dirname(path), "*.arrow")):
+            if old != path:
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    continue
+
+    def load(self, city, speciality, version) -> Optional[pd.DataFrame]:
+        if version is None:
+            return None
+        if self.ipc_root is not None:
+            frame = self.load_ipc(city, speciality, version)
+            if frame is not None:
+                return frame
+        frame = self.store.read(city, speciality)
+        if frame is not None and self.ipc_root is not None:
+            self.save_ipc(city, speciality, version, frame)
+        return frame
+
+    def get(self, city, speciality) -> Optional[pd.DataFrame]:
+        """The whole stored (city, speciality) table, or None when nothing is stored for it."""
+        return self.partition(city, speciality).frame
+
+    def partition(self, city, speciality) -> Partition:
+        key = (city, speciality)
+        now = time.monotonic()
+        with self.lock:
+            partition = self.partitions.get(key)
+            if partition is not None and now - partition.checked_at < self.check_interval:
+                self.partitions.move_to_end(key)
+                self.hits += 1
+                return partition
+
+        version = self.store.partition_version(city, speciality)
+        with self.lock:
+            partition = self.partitions.get(key)
+            if partition is not None and partition.version == version and partition.checked_at > float("-inf"):
+                partition.checked_at = now
+                self.partitions.move_to_end(key)
+                self.hits += 1
+                return partition
+            self.misses += 1
+
+        # the version is taken before reading, so a write landing mid-read is picked up by the next check
+        frame = self.load(city, speciality, version)
+        loaded = Partition(frame, version, now)
+        with self.lock:
+            previous = self.partitions.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+                self.reloads += 1
+            self.bounds[key] = (version, now, loaded.bounds())
+            self.partitions[key] = loaded
+            self.size += loaded.size
+            while self.size > self.max_bytes and len(self.partitions) > 1:
+                _, evicted = self.partitions.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += 1
+        return loaded
+
+    def read(
+        self,
+        city,
+        speciality,
+        columns: Optional[List[str]] = None,
+        localities: Optional[Iterable[str]] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Same contract as DoctorStore.read, served from memory."""
+        df = self.get(city, speciality)
+        if df is None:
+            return None
+        if localities is not None:
+            df = df[df['locality'].isin(list(localities))]
+        return df[columns] if columns is not None else df
+
+    def cities(self, speciality) -> List[str]:
+        now = time.monotonic()
+        with self.lock:
+            cached = self.city_lists.get(speciality)
+            if cached is not None and now - cached[0] < self.check_interval:
+                return cached[1]
+        cities = self.store.cities(speciality)
+        with self.lock:
+            self.city_lists[speciality] = (now, cities)
+        return cities
+
+    def out_of_range(self, city, speciality, lat, lng, radius):
+        """True when the partition is known to hold no doctor within `radius` of (lat, lng)."""
+        key = (city, speciality)
+        with self.lock:
+            entry = self.bounds.get(key)
+        if entry is None:
+            return False
+        version, checked_at, bounds = entry
+        now = time.monotonic()
+        if now - checked_at >= self.check_interval:
+            if self.store.partition_version(city, speciality) != version:
+                return False
+            with self.lock:
+                self.bounds[key] = (version, now, bounds)
+        return bounds is None or not circle_overlaps(bounds, lat, lng, radius)
+
+    def nearby(self, speciality, lat, lng, radius) -> Optional[pd.DataFrame]:
+        """Stored doctors of `speciality` within `radius` metres of (lat, lng), nearest first."""
+        frames = []
+        for city in self.cities(speciality):
+            if self.out_of_range(city, speciality, lat, lng, radius):
+                continue
+            index = self.partition(city, speciality).index
+            if index is not None and len(index):
+                frames.append(index.query(lat, lng, radius))
+        if not frames:
+            return None
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values('distance_m', kind='stable', ignore_index=True)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "partitions": len(self.partitions),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,98 @@
+import asyncio
+import random
+from urllib.parse import urlsplit
+
+import httpx
+
+from constants import HTTPConstants
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HTTPClient:
+    """
+    Shared async HTTP layer for every upstream call (Places, Practo, Gemini).
+    Keeps one keep-alive connection pool per event loop, caps concurrent requests
+    per host, applies timeouts, and retries transport errors and retryable
+    statuses with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        timeout: float = HTTPConstants.timeout,
+        connect_timeout: float = HTTPConstants.connect_timeout,
+        max_connections: int = HTTPConstants.max_connections,
+        max_keepalive_connections: int = HTTPConstants.max_keepalive_connections,
+        per_host_limit: int = HTTPConstants.per_host_limit,
+        retries: int = HTTPConstants.retries,
+        backoff: float = HTTPConstants.backoff,
+    ):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff = backoff
+        # clients and semaphores are bound to the loop they were created on; their
+        # connections reference the loop, so weak keys would never expire
+        self.loops = {}
+
+    def prune(self):
+        """Forgets clients of loops closed without calling aclose on them."""
+        for loop in [loop for loop in list(self.loops) if loop.is_closed()]:
+            self.loops.pop(loop, None)
+
+    def state(self):
+        loop = asyncio.get_running_loop()
+        state = self.loops.get(loop)
+        if state is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True,
+                headers={"User-Agent": HTTPConstants.user_agent},
+            )
+            state = (client, {})
+            self.prune()
+            self.loops[loop] = state
+        return state
+
+    def host_semaphore(self, url):
+        _, semaphores = self.state()
+        host = urlsplit(url).netloc
+        if host not in semaphores:
+            semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return semaphores[host]
+
+    async def request(self, method, url, **kwargs) -> httpx.Response:
+        client, _ = self.state()
+        semaphore = self.host_semaphore(url)
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                async with semaphore:
+                    response = await client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    return response
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+            await asyncio.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+
+    async def get(self, url, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        loop = asyncio.get_running_loop()
+        state = self.loops.pop(loop, None)
+        if state is not None:
+            await state[0].aclose()
+
+
+http = HTTPClient()
@@ -0,0 +1,315 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from typing import List, Optional, Tuple
+
+from constants import JobConstants
+
+
+class JobQueue:
+    """
+    Durable SQLite queue of (city, speciality) refresh jobs. A combination has at
+    most one job row, so enqueueing one that is already queued or running is a
+    no-op. It also tracks how often each combination is requested and when it
+    was last refreshed, which the scheduler uses to pick stale and popular work.
+
+    Requests are counted in memory and written by `flush_requests`, which the
+    worker's scheduler calls every scan, so serving a request never waits on the
+    SQLite write lock shared by all worker processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # (city, speciality) -> (requests, last requested) not yet flushed
+        self.requests = {}
+        # (city, speciality) -> when enqueue(min_interval=...) last reached SQLite
+        self.enqueued = {}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "city TEXT NOT NULL, speciality TEXT NOT NULL, status TEXT NOT NULL, "
+                "enqueued_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, "
+                "PRIMARY KEY (city, speciality))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS combinations ("
+                "city TEXT NOT NULL, speciality TEXT NOT NULL, "
+                "requests INTEGER NOT NULL DEFAULT 0, last_requested REAL, last_refreshed REAL, "
+                "PRIMARY KEY (city, speciality))"
+            )
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def enqueue(self, city, speciality, min_interval: float = 0):
+        """
+        Queues a job unless one is pending or the last one finished under `min_interval`
+        seconds ago. Within `min_interval` of this process's previous call for the same
+        combination the job is known to be pending or recent, so SQLite is skipped.
+        """
+        now = time.time()
+        if min_interval:
+            with self.lock:
+                last = self.enqueued.get((city, speciality))
+                if last is not None and now - last < min_interval:
+                    return
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (city, speciality, status, enqueued_at) VALUES (?, ?, 'queued', ?) "
+                "ON CONFLICT (city, speciality) DO UPDATE SET status = 'queued', enqueued_at = excluded.enqueued_at, "
+                "error = NULL WHERE jobs.status NOT IN ('queued', 'running') "
+                "AND (jobs.finished_at IS NULL OR jobs.finished_at < ?)",
+                (city, speciality, now, now - min_interval),
+            )
+        if min_interval:
+            with self.lock:
+                self.enqueued[(city, speciality)] = now
+
+    def claim(self) -> Optional[Tuple[str, str]]:
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT city, speciality FROM jobs WHERE status = 'queued' ORDER BY enqueued_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 "
+                    "WHERE city = ? AND speciality = ?",
+                    (time.time(), *row),
+                )
+            conn.execute("COMMIT")
+            return row
+        except BaseException:
+            # BEGIN IMMEDIATE itself may have failed, e.g. on a lock held by another worker
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, city, speciality, error: Optional[str] = None):
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE city = ? AND speciality = ?",
+                ("failed" if error else "done", now, error, city, speciality),
+            )
+            if error is None:
+                conn.execute(
+                    "INSERT INTO combinations (city, speciality, last_refreshed) VALUES (?, ?, ?) "
+                    "ON CONFLICT (city, speciality) DO UPDATE SET last_refreshed = excluded.last_refreshed",
+                    (city, speciality, now),
+                )
+
+    def recover(self, running_timeout: float = JobConstants.running_timeout):
+        """Requeues jobs left running for too long, e.g. by a process that stopped mid-job."""
+        with self.connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND started_at < ?",
+                (time.time() - running_timeout,),
+            )
+
+    def record_request(self, city, speciality):
+        self.record_requests([(city, speciality)])
+
+    def record_requests(self, combinations: List[Tuple[str, str]]):
+        now = time.time()
+        with self.lock:
+            for combination in combinations:
+                count, _ = self.requests.get(combination, (0, now))
+                self.requests[combination] = (count + 1, now)
+
+    def flush_requests(self):
+        """Adds the request counts gathered in memory since the last flush to SQLite."""
+        with self.lock:
+            pending, self.requests = self.requests, {}
+        if not pending:
+            return
+        try:
+            with self.connect() as conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO combinations (city, speciality, requests, last_requested) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (city, speciality) DO UPDATE SET requests = requests + excluded.requests, "
+                    "last_requested = max(coalesce(last_requested, 0), excluded.last_requested)",
+                    [(city, speciality, count, last) for (city, speciality), (count, last) in pending.items()],
+                )
+                conn.execute("COMMIT")
+        except BaseException:
+            # keep the counts for the next flush
+            with self.lock:
+                for combination, (count, last) in pending.items():
+                    newer, latest = self.requests.get(combination, (0, last))
+                    self.requests[combination] = (count + newer, max(last, latest))
+            raise
+
+    def reserve(self, city, speciality) -> bool:
+        """
+        Gives a combination never seen before a running job row, for the request that
+        scrapes it inline; False when it has a row already. The row is written before
+        the listing is read, so a combination whose listing turns out empty or fails
+        is seen from then on too.
+        """
+        now = time.time()
+        with self.connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (city, speciality, status, enqueued_at, started_at) "
+                "VALUES (?, ?, 'running', ?, ?) ON CONFLICT (city, speciality) DO NOTHING",
+                (city, speciality, now, now),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, city, speciality, requeue: bool):
+        """Ends an inline scrape begun with `reserve`, queueing a full refresh if `requeue`."""
+        now = time.time()
+        with self.connect() as conn:
+            if requeue:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', enqueued_at = ? "
+                    "WHERE city = ? AND speciality = ? AND status = 'running'",
+                    (now, city, speciality),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'done', finished_at = ? "
+                    "WHERE city = ? AND speciality = ? AND status = 'running'",
+                    (now, city, speciality),
+                )
+
+    def stale(self, max_age: float, retry_after: float, limit: int) -> List[Tuple[str, str]]:
+        """
+        Most requested combinations never refreshed or refreshed more than `max_age`
+        seconds ago, skipping those whose last job finished under `retry_after` ago.
+        """
+        now = time.time()
+        with self.connect() as conn:
+            return conn.execute(
+                "SELECT c.city, c.speciality FROM combinations c "
+                "LEFT JOIN jobs j ON j.city = c.city AND j.speciality = c.speciality "
+                "WHERE (c.last_refreshed IS NULL OR c.last_refreshed < ?) "
+                "AND (j.finished_at IS NULL OR j.finished_at < ?) "
+                "ORDER BY c.requests DESC LIMIT ?",
+                (now - max_age, now - retry_after, limit),
+            ).fetchall()
+
+    def stats(self):
+        with self.connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+
+class RefreshWorker:
+    """
+    Runs queued refresh jobs on its own thread and event loop, away from the
+    request path, and periodically enqueues stale or popular combinations.
+    `refresh(city, speciality)` is the coroutine function doing the actual work.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        refresh,
+        concurrency: int = JobConstants.worker_concurrency,
+        poll_interval: float = JobConstants.poll_interval,
+        scan_interval: float = JobConstants.scan_interval,
+        refresh_after: float = JobConstants.refresh_after,
+        retry_after: float = JobConstants.retry_after,
+        prewarm_limit: int = JobConstants.prewarm_limit,
+    ):
+        self.queue = queue
+        self.refresh = refresh
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.scan_interval = scan_interval
+        self.refresh_after = refresh_after
+        self.retry_after = retry_after
+        self.prewarm_limit = prewarm_limit
+        self.thread = None
+        self.loop = None
+        self.stopping = None
+        self.stop_requested = False
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.queue.recover()
+        self.stop_requested = False
+        self.thread = threading.Thread(target=self.run_forever, name="refresh-worker", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self.stop_requested = True
+        if self.loop is not None and self.stopping is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run_forever(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self.main())
+        finally:
+            self.loop.close()
+
+    async def main(self):
+        self.stopping = asyncio.Event()
+        if self.stop_requested:
+            self.stopping.set()
+        scheduler = asyncio.create_task(self.scheduler())
+        consumers = [asyncio.create_task(self.consumer()) for _ in range(self.concurrency)]
+        await self.stopping.wait()
+        scheduler.cancel()
+        # consumers stop claiming once stopping is set and finish the job in hand
+        await asyncio.gather(scheduler, *consumers, return_exceptions=True)
+        try:
+            await asyncio.to_thread(self.queue.flush_requests)
+        except Exception as e:
+            print(f"Flushing request counts failed: {e!r}")
+
+    async def scheduler(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.queue.flush_requests)
+                for city, speciality in await asyncio.to_thread(
+                    self.queue.stale, self.refresh_after, self.retry_after, self.prewarm_limit
+                ):
+                    await asyncio.to_thread(self.queue.enqueue, city, speciality)
+            except Exception as e:
+                # e.g. "database is locked" while other workers write; the next scan tries again
+                print(f"Scheduling refreshes failed: {e!r}")
+            await asyncio.sleep(self.scan_interval)
+
+    async def consumer(self):
+        while not self.stopping.is_set():
+            try:
+                job = await asyncio.to_thread(self.queue.claim)
+            except Exception as e:
+                print(f"Claiming a refresh job failed: {e!r}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            city, speciality = job
+            error = None
+            try:
+                await self.refresh(city, speciality)
+            except Exception as e:
+                error = repr(e)
+                print(f"Refresh of {city}/{speciality} failed: {error}")
+            try:
+                await asyncio.to_thread(self.queue.complete, city, speciality, error)
+            except Exception as e:
+                # the job stays running until recover() requeues it
+                print(f"Completing the refresh of {city}/{speciality} failed: {e!r}")
@@ -0,0 +1,163 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from typing import Dict, List, Optional, Tuple
+
+
+# upper bounds in seconds; stages range from sub-millisecond cache hits to multi-second scrapes
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PREFIX = "medrec"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Tuple[Tuple[str, str], ...]):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+                break
+
+
+class Registry:
+    """
+    Process-wide stage histograms and counters, rendered in the Prometheus text
+    exposition format. Every finished span lands here: its duration in the stage
+    histogram, its `status` attribute (if any) in the upstream response counter and
+    its `cache_hit` attribute (if any) in the cache lookup counter.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: Dict[Tuple, Histogram] = {}
+        self.counters: Dict[str, Dict[Tuple, float]] = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, name: str, labels: Dict[str, str], value: float):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, labels: Dict[str, str], amount: float = 1):
+        with self.lock:
+            self.counters[name][tuple(sorted(labels.items()))] += amount
+
+    def record_span(self, stage: str, seconds: float, attributes: dict):
+        self.observe("stage_seconds", {"stage": stage}, seconds)
+        if "status" in attributes:
+            self.increment("upstream_responses_total", {"stage": stage, "status": attributes["status"]})
+        if "cache_hit" in attributes:
+            result = "hit" if attributes["cache_hit"] else "miss"
+            self.increment("cache_lookups_total", {"stage": stage, "result": result})
+
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            by_name = defaultdict(list)
+            for (name, labels), histogram in self.histograms.items():
+                by_name[name].append((labels, histogram))
+            for name, series in sorted(by_name.items()):
+                lines.append(f"# TYPE {PREFIX}_{name} histogram")
+                for labels, histogram in sorted(series, key=lambda item: item[0]):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = format_labels(labels + (("le", repr(bound)),))
+                        lines.append(f"{PREFIX}_{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{PREFIX}_{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{PREFIX}_{name}_sum{format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{PREFIX}_{name}_count{format_labels(labels)} {histogram.count}")
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {PREFIX}_{name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{PREFIX}_{name}{format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# spans finished while a trace is active are also appended to it, for debug responses
+current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+        self.lock = threading.Lock()
+
+    def add(self, stage: str, started: float, seconds: float, attributes: dict):
+        with self.lock:
+            self.spans.append({
+                "stage": stage,
+                "start_ms": round(1000 * (started - self.started), 3),
+                "duration_ms": round(1000 * seconds, 3),
+                **attributes,
+            })
+
+    def to_json(self):
+        with self.lock:
+            return sorted(self.spans, key=lambda span: span["start_ms"])
+
+
+class span:
+    """
+    Times the enclosed block as one `stage`; works in sync and async code alike.
+
+        with span("places") as timing:
+            response = await transport(url)
+            timing.set(status=response.status_code)
+    """
+
+    def __init__(self, stage: str, **attributes):
+        self.stage = stage
+        self.attributes = attributes
+        self.started = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.attributes.setdefault("error", exc_type.__name__)
+        registry.record_span(self.stage, seconds, self.attributes)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add(self.stage, self.started, seconds, self.attributes)
+        return False
+
+
+def start_trace() -> Tuple[Trace, contextvars.Token]:
+    """Collects the spans of everything the current context (and tasks it creates) runs from now on."""
+    trace = Trace()
+    return trace, current_trace.set(trace)
+
+
+def end_trace(token: contextvars.Token):
+    current_trace.reset(token)
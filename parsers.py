@@ -0,0 +1,291 @@
+import re
+
+from typing import Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from constants import APIConstants
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+FEE_CLASS = 'u-f-right u-large-font u-bold u-valign--middle u-lheight-normal'
+ADDRESS_CLASS = 'c-profile--clinic__address'
+
+PROFILE_FIELDS = {
+    'doctor-name': 'h1',
+    'doctor-specializations': 'div',
+    'doctor-profile-image': 'img',
+    'doctor-summary': 'div',
+    'get-directions': 'a',
+    'clinic-address': 'p',
+}
+
+LISTING_FIELDS = {
+    'doctor_name': 'h2',
+    'doctor_experience': 'div',
+    'practice_locality': 'span',
+    'practice_city': 'span',
+}
+
+
+def format_string(string: str):
+    return string.lower().replace(" ", "-")
+
+
+def build_listing_doctor(name, experience, locality, city, href):
+    return {
+        'name': name if name is not None else 'N/A',
+        'experience': experience if experience is not None else 'N/A',
+        'locality': format_string((locality if locality is not None else 'N/A')[:-1]),
+        'city': format_string(city if city is not None else 'N/A'),
+        'profile_url': f"{APIConstants.practo_url}{href}" if href is not None else 'N/A',
+    }
+
+
+def build_profile(name, specialization_text, image_src, fee_text, summary, directions_href, clinic_address):
+    """Turns the raw text pulled out of a profile page into Doctor fields, whichever parser produced it."""
+    if specialization_text is not None:
+        experience_match = re.search(r'(\d+)\s*Years', specialization_text)
+        experience = experience_match.group(1) + ' Years' if experience_match else 'N/A'
+        specializations = re.sub(r'\d+\s*Years.*', '', specialization_text).strip()
+    else:
+        specializations = 'N/A'
+        experience = 'N/A'
+
+    latitude = None
+    longitude = None
+    if directions_href is not None:
+        lat_lng_match = re.search(r'place/([-.\d]+),([-.\d]+)', directions_href)
+        if lat_lng_match:
+            latitude = lat_lng_match.group(1)
+            longitude = lat_lng_match.group(2)
+
+    clinic_address = clinic_address if clinic_address is not None else 'N/A'
+    address = clinic_address
+    landmark = None
+    if "Landmark: " in clinic_address:
+        parts = clinic_address.split("Landmark: ")
+        address = parts[0].strip()
+        landmark = parts[1].strip()
+
+    return {
+        'name': name if name is not None else 'N/A',
+        'specializations': specializations,
+        'experience': experience,
+        'profile_image_url': image_src.split('?')[0] if image_src is not None else 'N/A',
+        'consultation_fee': re.sub(r'[^\d]', '', fee_text) if fee_text is not None else 'N/A',
+        'summary': summary if summary is not None else 'N/A',
+        'address': address,
+        'landmark': landmark,
+        'lat': latitude,
+        'lng': longitude,
+    }
+
+
+# BeautifulSoup: the reference implementation, always available
+
+def parse_listing_bs4(content) -> List[dict]:
+    doctors = []
+    soup = BeautifulSoup(content, 'html.parser')
+    for card in soup.find_all('div', class_='listing-doctor-card'):
+        texts = {}
+        for qa_id, tag in LISTING_FIELDS.items():
+            found = card.find(tag, {'data-qa-id': qa_id})
+            texts[qa_id] = found.get_text(strip=True) if found else None
+        link = card.find('a', href=True)
+        doctors.append(build_listing_doctor(
+            texts['doctor_name'],
+            texts['doctor_experience'],
+            texts['practice_locality'],
+            texts['practice_city'],
+            link['href'] if link else None,
+        ))
+    return doctors
+
+
+def parse_profile_bs4(content) -> dict:
+    soup = BeautifulSoup(content, 'html.parser')
+
+    name_tag = soup.find('h1', {'data-qa-id': 'doctor-name'})
+    specializations_tag = soup.find('div', {'data-qa-id': 'doctor-specializations'})
+    image_tag = soup.find('img', {'data-qa-id': 'doctor-profile-image'})
+    fee_tag = soup.find('div', class_=FEE_CLASS)
+    summary_tag = soup.find('div', {'data-qa-id': 'doctor-summary'})
+    directions_tag = soup.find('a', {'data-qa-id': 'get-directions'})
+    address_tag = soup.find('p', {'class': ADDRESS_CLASS, 'data-qa-id': 'clinic-address'})
+
+    if summary_tag:
+        more_button = summary_tag.find('span', {'data-qa-id': 'summary-more'})
+        if more_button:
+            more_button.extract()
+
+    return build_profile(
+        name_tag.get_text(strip=True) if name_tag else None,
+        specializations_tag.get_text(strip=True) if specializations_tag else None,
+        image_tag['src'] if image_tag else None,
+        fee_tag.get_text(strip=True) if fee_tag else None,
+        summary_tag.get_text(strip=True) if summary_tag else None,
+        directions_tag.get('href') if directions_tag else None,
+        address_tag.get_text(strip=True) if address_tag else None,
+    )
+
+
+# lxml: one walk over the tree, dispatching on data-qa-id
+
+def lxml_text(element):
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def parse_listing_lxml(content) -> List[dict]:
+    doctors = []
+    root = lxml.html.fromstring(content)
+    for card in root.iter('div'):
+        if 'listing-doctor-card' not in (card.get('class') or '').split():
+            continue
+        found = {}
+        href = None
+        for element in card.iter():
+            qa_id = element.get('data-qa-id') if isinstance(element.tag, str) else None
+            if qa_id in LISTING_FIELDS and element.tag == LISTING_FIELDS[qa_id] and qa_id not in found:
+                found[qa_id] = lxml_text(element)
+            elif href is None and element.tag == 'a' and element.get('href') is not None:
+                href = element.get('href')
+        doctors.append(build_listing_doctor(
+            found.get('doctor_name'),
+            found.get('doctor_experience'),
+            found.get('practice_locality'),
+            found.get('practice_city'),
+            href,
+        ))
+    return doctors
+
+
+def parse_profile_lxml(content) -> dict:
+    root = lxml.html.fromstring(content)
+    found = {}
+    fee = None
+    for element in root.iter():
+        if not isinstance(element.tag, str):
+            continue
+        qa_id = element.get('data-qa-id')
+        if qa_id in PROFILE_FIELDS and element.tag == PROFILE_FIELDS[qa_id] and qa_id not in found:
+            if qa_id != 'clinic-address' or ADDRESS_CLASS in (element.get('class') or '').split():
+                found[qa_id] = element
+        elif fee is None and element.tag == 'div' and ' '.join((element.get('class') or '').split()) == FEE_CLASS:
+            fee = element
+
+    summary = found.get('doctor-summary')
+    if summary is not None:
+        for more_button in summary.iter('span'):
+            if more_button.get('data-qa-id') == 'summary-more':
+                more_button.drop_tree()
+                break
+
+    def text(qa_id):
+        element = found.get(qa_id)
+        return lxml_text(element) if element is not None else None
+
+    image = found.get('doctor-profile-image')
+    directions = found.get('get-directions')
+    return build_profile(
+        text('doctor-name'),
+        text('doctor-specializations'),
+        image.get('src') if image is not None else None,
+        lxml_text(fee) if fee is not None else None,
+        text('doctor-summary'),
+        directions.get('href') if directions is not None else None,
+        text('clinic-address'),
+    )
+
+
+# selectolax (lexbor): one CSS query for every element of interest
+
+def node_text(node):
+    return node.text(deep=True, separator='', strip=True)
+
+
+def parse_listing_selectolax(content) -> List[dict]:
+    doctors = []
+    tree = LexborHTMLParser(content)
+    for card in tree.css('div.listing-doctor-card'):
+        found = {}
+        href = None
+        for node in card.css('[data-qa-id], a[href]'):
+            qa_id = node.attributes.get('data-qa-id')
+            if qa_id in LISTING_FIELDS and node.tag == LISTING_FIELDS[qa_id] and qa_id not in found:
+                found[qa_id] = node_text(node)
+            if href is None and node.tag == 'a' and node.attributes.get('href') is not None:
+                href = node.attributes['href']
+        doctors.append(build_listing_doctor(
+            found.get('doctor_name'),
+            found.get('doctor_experience'),
+            found.get('practice_locality'),
+            found.get('practice_city'),
+            href,
+        ))
+    return doctors
+
+
+def parse_profile_selectolax(content) -> dict:
+    tree = LexborHTMLParser(content)
+    found = {}
+    fee = None
+    for node in tree.css('[data-qa-id], div[class]'):
+        qa_id = node.attributes.get('data-qa-id')
+        classes = (node.attributes.get('class') or '').split()
+        if qa_id in PROFILE_FIELDS and node.tag == PROFILE_FIELDS[qa_id] and qa_id not in found:
+            if qa_id != 'clinic-address' or ADDRESS_CLASS in classes:
+                found[qa_id] = node
+        if fee is None and node.tag == 'div' and ' '.join(classes) == FEE_CLASS:
+            fee = node
+
+    summary = found.get('doctor-summary')
+    if summary is not None:
+        more_button = summary.css_first('span[data-qa-id="summary-more"]')
+        if more_button is not None:
+            more_button.decompose()
+
+    def text(qa_id):
+        node = found.get(qa_id)
+        return node_text(node) if node is not None else None
+
+    image = found.get('doctor-profile-image')
+    directions = found.get('get-directions')
+    return build_profile(
+        text('doctor-name'),
+        text('doctor-specializations'),
+        image.attributes.get('src') if image is not None else None,
+        node_text(fee) if fee is not None else None,
+        text('doctor-summary'),
+        directions.attributes.get('href') if directions is not None else None,
+        text('clinic-address'),
+    )
+
+
+BACKENDS: Dict[str, Dict[str, Callable]] = {}
+if LexborHTMLParser is not None:
+    BACKENDS['selectolax'] = {'listing': parse_listing_selectolax, 'profile': parse_profile_selectolax}
+if lxml is not None:
+    BACKENDS['lxml'] = {'listing': parse_listing_lxml, 'profile': parse_profile_lxml}
+BACKENDS['bs4'] = {'listing': parse_listing_bs4, 'profile': parse_profile_bs4}
+
+DEFAULT_BACKEND = next(iter(BACKENDS))
+
+
+def parse_listing(content, backend: Optional[str] = None) -> List[dict]:
+    """Doctor fields for every card on a Practo listing page, using the fastest installed parser."""
+    return BACKENDS[backend or DEFAULT_BACKEND]['listing'](content)
+
+
+def parse_profile(content, backend: Optional[str] = None) -> dict:
+    """Doctor fields from a Practo profile page, using the fastest installed parser."""
+    return BACKENDS[backend or DEFAULT_BACKEND]['profile'](content)
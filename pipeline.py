@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+from typing import AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Union
+
+from constants import PipelineConstants
+
+
+_DONE = object()
+
+
+class StageMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds, dropped):
+        self.processed += 1
+        self.dropped += int(dropped)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_json(self):
+        return {
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "mean_ms": 1000 * self.total_seconds / self.processed if self.processed else 0.0,
+            "max_ms": 1000 * self.max_seconds,
+        }
+
+
+class Stage:
+    """
+    One step of a Pipeline: `func` is awaited once per item with at most
+    `concurrency` calls in flight. Items for which `func` returns None (or a
+    non-`keep` value) are dropped instead of being passed downstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[object], Awaitable[object]],
+        concurrency: int,
+        keep: Optional[Callable[[object], bool]] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.keep = keep or (lambda item: item is not None)
+        self.metrics = StageMetrics(name)
+
+
+class Pipeline:
+    """
+    Streams items through a chain of stages connected by bounded queues, so each
+    item enters the next stage as soon as it leaves the previous one and a slow
+    stage applies backpressure upstream instead of buffering without limit.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = PipelineConstants.queue_size):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    async def feed(self, source: Union[AsyncIterable, Iterable], queue: asyncio.Queue, workers: int):
+        try:
+            if hasattr(source, "__aiter__"):
+                async for item in source:
+                    await queue.put(item)
+            else:
+                for item in source:
+                    await queue.put(item)
+        finally:
+            for _ in range(workers):
+                await queue.put(_DONE)
+
+    async def work(self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            started = time.perf_counter()
+            try:
+                result = await stage.func(item)
+            except Exception as e:
+                print(f"Pipeline stage {stage.name} failed: {e!r}")
+                result = None
+            kept = stage.keep(result)
+            stage.metrics.record(time.perf_counter() - started, not kept)
+            if kept:
+                await outbox.put(result)
+
+    async def drive(self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue, downstream_workers: int):
+        await asyncio.gather(*[self.work(stage, inbox, outbox) for _ in range(stage.concurrency)])
+        for _ in range(downstream_workers):
+            await outbox.put(_DONE)
+
+    async def run(self, source: Union[AsyncIterable, Iterable]):
+        """Yields results of the last stage in completion order."""
+        queues = [asyncio.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        tasks = [asyncio.create_task(self.feed(source, queues[0], self.stages[0].concurrency))]
+        for position, stage in enumerate(self.stages):
+            # one end marker per worker of the next stage; the consumer below counts as one
+            downstream = self.stages[position + 1].concurrency if position + 1 < len(self.stages) else 1
+            tasks.append(asyncio.create_task(self.drive(stage, queues[position], queues[position + 1], downstream)))
+        try:
+            while True:
+                item = await queues[-1].get()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def collect(self, source: Union[AsyncIterable, Iterable]) -> list:
+        return [item async for item in self.run(source)]
+
+    def metrics(self):
+        return {stage.name: stage.metrics.to_json() for stage in self.stages}
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from cache import TTLCache
+from constants import CacheConstants
+from metrics import span
+
+
+class LocalityCache:
+    """
+    Caches Places locality lookups per quantized location cell and radius. Results
+    live in memory and in a SQLite file so they survive restarts, and concurrent
+    lookups for the same cell wait on the one upstream call already in flight.
+
+    `fetch(latitude, longitude, radius)` is a coroutine function performing the
+    upstream lookup for the cell centre; it is expected to return a dict with an
+    "error" key on failure, which is passed through without being cached.
+    """
+
+    def __init__(
+        self,
+        fetch,
+        path,
+        ttl: float = CacheConstants.locality_ttl,
+        cell_degrees: float = CacheConstants.locality_cell_degrees,
+        memory_size: int = CacheConstants.locality_memory_size,
+    ):
+        self.fetch = fetch
+        self.path = path
+        self.ttl = ttl
+        self.cell_degrees = cell_degrees
+        self.memory = TTLCache(memory_size, ttl)
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS localities ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def cell(self, latitude, longitude, radius):
+        row = math.floor(float(latitude) / self.cell_degrees)
+        col = math.floor(float(longitude) / self.cell_degrees)
+        return f"{row}:{col}:{int(radius)}", (row + 0.5) * self.cell_degrees, (col + 0.5) * self.cell_degrees
+
+    def load(self, key):
+        with self.connect() as conn:
+            row = conn.execute("SELECT value, stored_at FROM localities WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] + self.ttl <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def save(self, key, value):
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO localities (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+
+    async def lookup(self, key):
+        value = self.memory.get(key)
+        if value is None:
+            value = await asyncio.to_thread(self.load, key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def claim(self, key):
+        """Returns (future, True) for the caller that must fetch, (future, False) for followers."""
+        with self.inflight_lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self.inflight[key] = future
+            return future, True
+
+    def release(self, key):
+        with self.inflight_lock:
+            self.inflight.pop(key, None)
+
+    async def resolve(self, key, future, latitude, longitude, radius):
+        try:
+            self.upstream_calls += 1
+            value = await self.fetch(latitude, longitude, radius)
+            if not (isinstance(value, dict) and "error" in value):
+                self.memory.set(key, value)
+                await asyncio.to_thread(self.save, key, value)
+        except asyncio.CancelledError:
+            # followers see a cancelled future and retry instead of being cancelled themselves
+            self.release(key)
+            future.cancel()
+            raise
+        except BaseException as e:
+            self.release(key)
+            future.set_exception(e)
+            raise
+        self.release(key)
+        future.set_result(value)
+        return value
+
+    async def get(self, latitude, longitude, radius):
+        key, center_lat, center_lng = self.cell(latitude, longitude, radius)
+        with span("places") as timing:
+            value = await self.lookup(key)
+            timing.set(cache_hit=value is not None)
+            if value is not None:
+                return value
+            while True:
+                future, leader = self.claim(key)
+                if leader:
+                    # the fetch is a task of its own, so cancelling this caller leaves it running for the followers
+                    fetch = asyncio.ensure_future(self.resolve(key, future, center_lat, center_lng, radius))
+                    return await asyncio.shield(fetch)
+                timing.set(coalesced=True)
+                # a concurrent.futures.Future, so followers on other event loops can wait on it too;
+                # asyncio.wait never cancels it, whatever happens to this follower
+                waiter = asyncio.wrap_future(future)
+                await asyncio.wait([waiter])
+                if not waiter.cancelled():
+                    return waiter.result()
+
+    def stats(self):
+        return {
+            **self.memory.stats(),
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,215 @@
+import asyncio
+import math
+import numbers
+from collections import defaultdict
+
+from typing import AsyncIterator, List, Optional
+
+from constants import practo_specializations, APIConstants, BatchConstants
+from db import RecDB
+from encoders import load_encoder, model_key
+from specialization_index import SpecializationIndex
+from batcher import BatchEncoder
+from cache import SymptomCache, normalize_symptoms
+from encoding import dumps
+from metrics import end_trace, span, start_trace
+
+
+def location_error(item: dict) -> Optional[str]:
+    """Why the item's latitude, longitude and radius (in metres) can't be searched, or None when they can."""
+    checks = (
+        ('latitude', item.get('latitude'), -90, 90),
+        ('longitude', item.get('longitude'), -180, 180),
+        # Places rejects a nearby search wider than 50 km
+        ('radius', item.get('radius', 5000), 1, 50000),
+    )
+    for key, value, low, high in checks:
+        if isinstance(value, bool) or not isinstance(value, numbers.Real) or math.isnan(value):
+            return f"{key} must be a number"
+        if not low <= value <= high:
+            return f"{key} must be between {low} and {high}"
+    return None
+
+
+def parse_flag(value) -> bool:
+    """Reads a JSON or query-string flag: "1", "true", "yes" and "on" are set, "0", "false" and the like are not."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+class Recommender:
+    """
+    Everything a request needs to go from symptoms to doctors, shared by the Flask
+    app and the ASGI app. `start` loads the model and starts background refreshes;
+    it blocks, so async servers run it in an executor.
+    """
+
+    def __init__(self, db: Optional[RecDB] = None):
+        self.db = db or RecDB()
+        self.model = None
+        self.specialization_index = None
+        self.batch_encoder = None
+        self.symptom_cache = SymptomCache()
+
+    def start(self):
+        if self.model is not None:
+            return
+        self.model = load_encoder(APIConstants.st_model, APIConstants.st_backend)
+        self.specialization_index = SpecializationIndex(
+            self.model, model_key(APIConstants.st_model, APIConstants.st_backend), practo_specializations
+        )
+        self.batch_encoder = BatchEncoder(self.model)
+        self.db.start_background()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Lets running refresh jobs finish, then stops the encoder thread."""
+        self.db.stop_background(timeout)
+        if self.batch_encoder is not None:
+            self.batch_encoder.close(timeout)
+
+    async def rank(self, symptoms: str):
+        with span("encode") as timing:
+            ranking = self.symptom_cache.get_ranking(symptoms, self.specialization_index.fingerprint)
+            timing.set(cache_hit=ranking is not None)
+            if ranking is None:
+                # encoding runs on the batch encoder's own thread, never on the event loop
+                symptom_vector = await self.batch_encoder.encode_async(symptoms)
+                ranking = self.specialization_index.rank(symptom_vector)
+                self.symptom_cache.set_ranking(symptoms, self.specialization_index.fingerprint, ranking)
+            timing.set(speciality=ranking[0][0])
+        return ranking
+
+    async def rank_many(self, symptoms: List[str]):
+        """Rankings for every symptom string, with all cache misses encoded in one pass."""
+        fingerprint = self.specialization_index.fingerprint
+        keys = [normalize_symptoms(text) for text in symptoms]
+        rankings = {}
+        misses = {}
+        with span("encode", items=len(symptoms)) as timing:
+            for key, text in zip(keys, symptoms):
+                if key in rankings or key in misses:
+                    continue
+                ranking = self.symptom_cache.get_ranking(text, fingerprint)
+                if ranking is None:
+                    misses[key] = text
+                else:
+                    rankings[key] = ranking
+            timing.set(cache_misses=len(misses))
+            if misses:
+                vectors = await self.batch_encoder.encode_many_async(list(misses.values()))
+                for (key, text), vector in zip(misses.items(), vectors):
+                    rankings[key] = self.specialization_index.rank(vector)
+                    self.symptom_cache.set_ranking(text, fingerprint, rankings[key])
+        return [rankings[key] for key in keys]
+
+    async def find_doctors(self, symptoms: str, lat, lng, radius):
+        speciality, _ = (await self.rank(symptoms))[0]
+        with span("get_doctors", speciality=speciality) as timing:
+            doctors = await self.db.get_doctors(lat, lng, radius, speciality)
+            timing.set(doctors=len(doctors))
+        return doctors
+
+    async def recommend(self, symptoms: str, lat, lng, radius, debug: bool = False):
+        """
+        Doctors for the symptoms. With `debug`, a dict holding the doctors and the
+        timing of every stage the request went through instead.
+        """
+        trace, token = start_trace() if debug else (None, None)
+        try:
+            with span("request"):
+                doctors = await self.find_doctors(symptoms, lat, lng, radius)
+        finally:
+            if token is not None:
+                end_trace(token)
+        if trace is None:
+            return doctors
+        return {"doctors": doctors, "timings": trace.to_json()}
+
+    async def recommend_batch(self, items: List[dict]) -> AsyncIterator[bytes]:
+        """
+        Resolves many {symptoms, latitude, longitude, radius} items in one pass and
+        yields one NDJSON line per item, in completion order. Symptoms are encoded
+        together, and items are grouped by their (cities, speciality): groups run
+        concurrently while the items of a group run one after another, so a table
+        is loaded, or scraped, once and the rest of the group is served from memory.
+        Items the hot tier already answers are grouped without a Places lookup; items
+        with missing symptoms or an unusable location get an error line of their own.
+        """
+        valid = []
+        for index, item in enumerate(items[:BatchConstants.max_items]):
+            if not isinstance(item, dict) or not isinstance(item.get('symptoms'), str) or not item['symptoms'].strip():
+                yield dumps({"index": index, "error": "Symptoms are required"}) + b"\n"
+            elif (error := location_error(item)) is not None:
+                yield dumps({"index": index, "error": error}) + b"\n"
+            else:
+                valid.append((index, item))
+        for index in range(BatchConstants.max_items, len(items)):
+            yield dumps({"index": index, "error": f"Batches are limited to {BatchConstants.max_items} items"}) + b"\n"
+        if not valid:
+            return
+
+        rankings = await self.rank_many([item['symptoms'] for _, item in valid])
+
+        async def cities(item, speciality):
+            lat, lng, radius = item['latitude'], item['longitude'], item.get('radius', 5000)
+            # items the hot tier already answers are grouped by the cities it found them in, without Places
+            nearby = await asyncio.to_thread(self.db.nearby_doctors, lat, lng, radius, speciality)
+            if nearby is not None and nearby['generated_summary'].notna().any():
+                return tuple(sorted(nearby['city'].dropna().unique()))
+            localities = await self.db.locality_cache.get(lat, lng, radius)
+            if isinstance(localities, dict):
+                return ()
+            return tuple(sorted({locality['city'] for locality in localities}))
+
+        with span("places_batch", items=len(valid)):
+            resolved = await asyncio.gather(
+                *[cities(item, ranking[0][0]) for (_, item), ranking in zip(valid, rankings)],
+                return_exceptions=True,
+            )
+
+        groups = defaultdict(list)
+        for (index, item), ranking, item_cities in zip(valid, rankings, resolved):
+            speciality, _ = ranking[0]
+            if isinstance(item_cities, Exception):
+                # get_doctors reports the failure again on the item's own line
+                print(f"Batch item {index} could not be grouped: {item_cities!r}")
+                item_cities = ()
+            groups[(item_cities, speciality)].append((index, item, speciality))
+
+        results = asyncio.Queue()
+        semaphore = asyncio.Semaphore(BatchConstants.group_concurrency)
+
+        async def run_group(members):
+            async with semaphore:
+                for index, item, speciality in members:
+                    try:
+                        with span("get_doctors", speciality=speciality) as timing:
+                            doctors = await self.db.get_doctors(
+                                item['latitude'], item['longitude'], item.get('radius', 5000), speciality
+                            )
+                            timing.set(doctors=len(doctors))
+                        line = {"index": index, "speciality": speciality, "doctors": doctors}
+                    except Exception as e:
+                        print(f"Batch item {index} failed: {e!r}")
+                        line = {"index": index, "speciality": speciality, "error": repr(e)}
+                    await results.put(line)
+
+        tasks = [asyncio.create_task(run_group(members)) for members in groups.values()]
+        try:
+            for _ in range(len(valid)):
+                yield dumps(await results.get()) + b"\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        return {
+            "symptom_cache": self.symptom_cache.stats(),
+            "encoder": self.batch_encoder.stats() if self.batch_encoder is not None else None,
+            "locality_cache": self.db.locality_cache.stats(),
+            "hot_tier": self.db.hot.stats(),
+            "pipeline": self.db.pipeline.metrics(),
+            "summaries": self.db.summaries.stats(),
+            "jobs": self.db.jobs.stats(),
+        }
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from typing import List, Tuple
+
+
+def normalize_rows(vectors: np.ndarray):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SpecializationIndex:
+    """
+    Holds one L2-normalized embedding per specialization in a single matrix so a
+    symptom query costs one encode and one matrix-vector product. The matrix is
+    persisted under `index_root`, keyed by the model name and the specialization list.
+    """
+
+    def __init__(self, model, model_name: str, specializations: List[str], index_root="db/index"):
+        self.model = model
+        self.model_name = model_name
+        self.specializations = list(specializations)
+        self.index_root = index_root
+        self.fingerprint = self.compute_fingerprint(model_name, self.specializations)
+        self.vectors = self.load_or_build()
+
+    @staticmethod
+    def compute_fingerprint(model_name: str, specializations: List[str]):
+        key = json.dumps({"model": model_name, "specializations": list(specializations)})
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    @property
+    def path(self):
+        return os.path.join(self.index_root, f"specializations-{self.fingerprint[:16]}.npz")
+
+    def load_or_build(self):
+        try:
+            stored = np.load(self.path)
+            if stored["fingerprint"].item() == self.fingerprint:
+                return stored["vectors"]
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            pass
+
+        vectors = normalize_rows(self.model.encode(self.specializations, convert_to_numpy=True))
+        os.makedirs(self.index_root, exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, vectors=vectors, fingerprint=np.array(self.fingerprint))
+        os.replace(tmp_path, self.path)
+        return vectors
+
+    def encode(self, symptoms: str):
+        return self.model.encode([symptoms], convert_to_numpy=True)[0]
+
+    def rank(self, vector: np.ndarray, top_k: int = 3) -> List[Tuple[str, float]]:
+        scores = self.vectors @ normalize_rows(vector)[0]
+        top_k = min(top_k, len(self.specializations))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.specializations[i], float(scores[i])) for i in top]
+
+    def match(self, symptoms: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        return self.rank(self.encode(symptoms), top_k)
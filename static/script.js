@@ -113,7 +113,7 @@ function addMarker(doctor) {
                      style="width: 50px; height: 50px; border-radius: 50%; margin-right: 10px;">
                 <div>
                     <strong>${doctor.name}</strong><br>
-                    ₹${doctor.consultation_fee}
+                    ₹${doctor.consultation_fee ?? 'N/A'}
                 </div>
             </div>
             <div style="margin-top: 10px;">
@@ -191,7 +191,7 @@ function openDoctorModal(doctor) {
             <img src="${doctor.profile_image_url}" alt="${doctor.name}" 
                  style="width: 100px; height: 100px; border-radius: 50%; margin-bottom: 10px;">
             <h2>${doctor.name}</h2>
-            <p><strong>Fee:</strong> ₹${doctor.consultation_fee}</p>
+            <p><strong>Fee:</strong> ₹${doctor.consultation_fee ?? 'N/A'}</p>
             <p><strong>Specializations:</strong> ${doctor.specializations || 'Not specified'}</p>
             <p><strong>Address:</strong> ${doctor.address}</p>
             <p><strong>Landmark:</strong> ${doctor.landmark}</p>
@@ -346,9 +346,9 @@ $(document).ready(() => {
                                 <div class="card-body">
                                     <h5 class="card-title">${doctor.name}</h5>
                                     <p class="card-text">Specialization: ${formattedSpecializations}</p>
-                                    <p class="card-text">Experience: ${doctor.experience}</p>
+                                    <p class="card-text">Experience: ${doctor.experience != null ? `${doctor.experience} Years` : 'N/A'}</p>
                                     <p class="card-text">Address: ${doctor.address}</p>
-                                    <p class="card-text">Consultation Fees: ₹${doctor.consultation_fee}</p>
+                                    <p class="card-text">Consultation Fees: ₹${doctor.consultation_fee ?? 'N/A'}</p>
                                     <p class="card-text">Summary: ${formattedSummary}</p>
                                     <p class="card-text"><strong>  </strong> ${doctor.rank} / ${response.length}</p>
                                     <a href="${doctor.profile_url}" class="btn btn-custom" target="_blank">View Profile</a>
@@ -0,0 +1,235 @@
+import glob
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from typing import Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+DOCTOR_COLUMNS = [
+    'name',
+    'specializations',
+    'experience',
+    'profile_image_url',
+    'consultation_fee',
+    'summary',
+    'generated_summary',
+    'profile_url',
+    'address',
+    'landmark',
+    'locality',
+    'city',
+    'lat',
+    'lng'
+]
+
+TIMESTAMP_COLUMNS = ['fetched_at', 'summarized_at']
+
+STORE_COLUMNS = DOCTOR_COLUMNS + TIMESTAMP_COLUMNS
+
+INT_COLUMNS = ['experience', 'consultation_fee']
+
+FLOAT_COLUMNS = ['lat', 'lng'] + TIMESTAMP_COLUMNS
+
+DOCTOR_SCHEMA = pa.schema([
+    (column, pa.int32() if column in INT_COLUMNS else pa.float64() if column in FLOAT_COLUMNS else pa.string())
+    for column in STORE_COLUMNS
+])
+
+
+def normalize_frame(df: pd.DataFrame):
+    """
+    Casts numeric columns to their stored types in place. Files written before the
+    columns were typed hold text like '12 Years' or 'N/A', which becomes 12 or null.
+    """
+    for column in INT_COLUMNS:
+        if column in df:
+            values = df[column]
+            if not pd.api.types.is_numeric_dtype(values):
+                values = values.astype('string').str.extract(r'(\d+)', expand=False)
+            df[column] = pd.to_numeric(values, errors='coerce').astype('Int64')
+    for column in FLOAT_COLUMNS:
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+
+def frame_to_table(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(normalize_frame(df.reindex(columns=STORE_COLUMNS)), schema=DOCTOR_SCHEMA, preserve_index=False)
+
+
+def write_table(table: pa.Table, path):
+    pq.write_table(table, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def frame_to_records(df: pd.DataFrame):
+    """Serializes a doctor table straight to JSON-ready dicts, mapping NaN/NA to None."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+def profile_stale_mask(df: pd.DataFrame, max_age: float):
+    """Rows whose profile was never fetched or was fetched more than `max_age` seconds ago."""
+    fetched_at = pd.to_numeric(df['fetched_at'], errors='coerce')
+    return fetched_at.isna() | (fetched_at < time.time() - max_age)
+
+
+def unsummarized_mask(df: pd.DataFrame):
+    return pd.to_numeric(df['summarized_at'], errors='coerce').isna()
+
+
+def stale_mask(df: pd.DataFrame, max_age: float):
+    """Rows that need revalidation: a stale or missing profile, or no generated summary yet."""
+    return profile_stale_mask(df, max_age) | unsummarized_mask(df)
+
+
+def read_file(file, columns: Optional[List[str]] = None):
+    """Reads a parquet file, filling columns missing from files written by older versions with nulls."""
+    if columns is None:
+        return normalize_frame(pd.read_parquet(file).reindex(columns=STORE_COLUMNS))
+    available = set(pq.read_schema(file).names)
+    df = pd.read_parquet(file, columns=[column for column in columns if column in available])
+    return normalize_frame(df.reindex(columns=columns))
+
+
+def deduplicate(df: pd.DataFrame):
+    """Keeps the last row written for every profile_url; rows without a usable url are all kept."""
+    has_url = df['profile_url'].notna() & (df['profile_url'] != 'N/A')
+    keyed = df[has_url].drop_duplicates(subset='profile_url', keep='last')
+    return pd.concat([keyed, df[~has_url]], ignore_index=True)
+
+
+class PartitionLock:
+    """Serializes writers of one (city, speciality) partition across threads and processes."""
+
+    thread_locks = defaultdict(threading.Lock)
+    registry_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        with self.registry_lock:
+            self.thread_lock = self.thread_locks[path]
+        self.handle = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            self.handle = open(os.path.join(self.path, ".lock"), "a")
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+        self.thread_lock.release()
+
+
+class DoctorStore:
+    """
+    Stores doctors partitioned by city and speciality. Each partition is a compacted
+    `data.parquet` plus append-only `part-*.parquet` files; a batch of doctors costs
+    one part-file write per partition, and parts are folded back into `data.parquet`
+    once `compact_after` of them have accumulated. Callables in `listeners` are
+    called with (city, speciality) after every write to a partition.
+    """
+
+    base_file = "data.parquet"
+    part_pattern = "part-*.parquet"
+
+    def __init__(self, doctors_root, compact_after=8):
+        self.doctors_root = doctors_root
+        self.compact_after = compact_after
+        self.listeners = []
+
+    def notify(self, city, speciality):
+        for listener in self.listeners:
+            listener(city, speciality)
+
+    def partition_path(self, city, speciality):
+        return os.path.join(self.doctors_root, city, speciality)
+
+    def cities(self, speciality):
+        pattern = os.path.join(self.doctors_root, "*", speciality)
+        return sorted(os.path.basename(os.path.dirname(path)) for path in glob.glob(pattern) if os.path.isdir(path))
+
+    def partition_version(self, city, speciality):
+        """
+        Modification time of the partition directory, which every part write, compaction
+        and part removal bumps; None when the partition does not exist.
+        """
+        try:
+            return os.stat(self.partition_path(city, speciality)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def part_files(self, path):
+        # part names start with a nanosecond timestamp, so name order is write order
+        return sorted(glob.glob(os.path.join(path, self.part_pattern)))
+
+    def append(self, records: List[dict], speciality):
+        groups = defaultdict(list)
+        for record in records:
+            groups[record['city']].append(record)
+
+        for city, group in groups.items():
+            path = self.partition_path(city, speciality)
+            os.makedirs(path, exist_ok=True)
+            table = frame_to_table(deduplicate(pd.DataFrame(group, columns=STORE_COLUMNS)))
+            with PartitionLock(path):
+                part = os.path.join(path, f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet")
+                write_table(table, part)
+                if len(self.part_files(path)) >= self.compact_after:
+                    self.compact_locked(path)
+            self.notify(city, speciality)
+
+    def compact_locked(self, path):
+        parts = self.part_files(path)
+        if not parts:
+            return
+        base = os.path.join(path, self.base_file)
+        frames = [read_file(file) for file in [base] + parts if os.path.exists(file)]
+        write_table(frame_to_table(deduplicate(pd.concat(frames, ignore_index=True))), base)
+        for part in parts:
+            os.remove(part)
+
+    def read(
+        self,
+        city,
+        speciality,
+        columns: Optional[List[str]] = None,
+        localities: Optional[Iterable[str]] = None,
+        retries=3,
+    ) -> Optional[pd.DataFrame]:
+        path = self.partition_path(city, speciality)
+        read_columns = columns
+        if columns is not None:
+            extra = [column for column in ('profile_url', 'locality') if column not in columns]
+            read_columns = list(columns) + extra
+        for _ in range(retries):
+            files = [os.path.join(path, self.base_file)] + self.part_files(path) if os.path.isdir(path) else []
+            files = [file for file in files if os.path.exists(file)]
+            if not files:
+                return None
+            try:
+                frames = [read_file(file, read_columns) for file in files]
+            except FileNotFoundError:
+                # a compaction removed a part between listing and reading it
+                continue
+            df = deduplicate(pd.concat(frames, ignore_index=True))
+            if localities is not None:
+                df = df[df['locality'].isin(list(localities))]
+            return df[columns] if columns is not None else df
+        return None
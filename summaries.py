@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from typing import Optional, Tuple
+
+import httpx
+
+from constants import APIConstants, SummaryConstants
+from http_client import http
+from metrics import span
+
+
+async def gemini_generate(prompt: str, transport=http.post, url: Optional[str] = None) -> Optional[Tuple[str, int]]:
+    """Returns (generated text, total tokens billed) or None when the model produced nothing."""
+    payload = {
+        "contents": [{
+            "parts": [{"text": prompt}]
+        }]
+    }
+    with span("gemini") as timing:
+        try:
+            response = await transport(f"{url or APIConstants.gemini_url}?key={APIConstants.gemini_api}", json=payload)
+        except httpx.HTTPError as e:
+            print(f"Failed to generate summary: {e!r}")
+            timing.set(error=type(e).__name__)
+            return None
+        timing.set(status=response.status_code)
+        if response.status_code != 200:
+            print(f"Failed to generate summary: {response.status_code}")
+            return None
+        result = response.json()
+        if "candidates" in result and len(result["candidates"]) > 0:
+            generated_text = result["candidates"][0]["content"]["parts"][0]["text"]
+            tokens = result.get("usageMetadata", {}).get("totalTokenCount", 0)
+            timing.set(tokens=tokens)
+            return generated_text, tokens
+        return None
+
+
+class SummaryService:
+    """
+    Generates doctor summaries through a bounded number of concurrent LLM calls and
+    remembers every generated text in SQLite, keyed by a hash of the prompt, so an
+    unchanged profile is never summarized twice. Identical prompts requested at the
+    same time share one upstream call.
+    """
+
+    def __init__(
+        self,
+        path,
+        transport=http.post,
+        url: Optional[str] = None,
+        concurrency: int = SummaryConstants.concurrency,
+    ):
+        self.path = path
+        self.transport = transport
+        self.url = url
+        self.concurrency = concurrency
+        # keyed by loop; entries of closed loops are dropped when a new loop shows up
+        self.semaphores = {}
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_used = 0
+        self.tokens_saved = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, tokens INTEGER NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def prompt_key(prompt: str):
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        with self.connect() as conn:
+            return conn.execute("SELECT text, tokens FROM summaries WHERE key = ?", (key,)).fetchone()
+
+    def save(self, key, text, tokens):
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, text, tokens, created_at) VALUES (?, ?, ?, ?)",
+                (key, text, tokens, time.time()),
+            )
+
+    def semaphore(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self.semaphores:
+            for closed in [other for other in list(self.semaphores) if other.is_closed()]:
+                self.semaphores.pop(closed, None)
+            self.semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self.semaphores[loop]
+
+    async def generate(self, prompt: str) -> Optional[str]:
+        with span("summary") as timing:
+            key = self.prompt_key(prompt)
+            cached = await asyncio.to_thread(self.load, key)
+            timing.set(cache_hit=cached is not None)
+            if cached is not None:
+                with self.lock:
+                    self.hits += 1
+                    self.tokens_saved += cached[1]
+                return cached[0]
+
+            with self.lock:
+                self.misses += 1
+            while True:
+                with self.lock:
+                    future = self.inflight.get(key)
+                    leader = future is None
+                    if leader:
+                        future = self.inflight[key] = Future()
+                if leader:
+                    # the call is a task of its own, so cancelling this caller leaves it running for the followers
+                    return await asyncio.shield(asyncio.ensure_future(self.resolve(key, future, prompt)))
+                timing.set(coalesced=True)
+                # asyncio.wait never cancels the shared future, whatever happens to this follower
+                waiter = asyncio.wrap_future(future)
+                await asyncio.wait([waiter])
+                if not waiter.cancelled():
+                    return waiter.result()
+
+    def release(self, key):
+        with self.lock:
+            self.inflight.pop(key, None)
+
+    async def resolve(self, key, future, prompt: str) -> Optional[str]:
+        try:
+            async with self.semaphore():
+                result = await gemini_generate(prompt, transport=self.transport, url=self.url)
+            text = None
+            if result is not None:
+                text, tokens = result
+                with self.lock:
+                    self.tokens_used += tokens
+                await asyncio.to_thread(self.save, key, text, tokens)
+        except asyncio.CancelledError:
+            # followers see a cancelled future and retry instead of being cancelled themselves
+            self.release(key)
+            future.cancel()
+            raise
+        except BaseException as e:
+            self.release(key)
+            future.set_exception(e)
+            raise
+        self.release(key)
+        future.set_result(text)
+        return text
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "tokens_used": self.tokens_used,
+                "tokens_saved": self.tokens_saved,
+            }